@@ -1,10 +1,29 @@
-import math
-import calendar
-import datetime
+import functools
+import hashlib
 import json
 import os
-from flask import Flask, render_template, request, make_response
+import tempfile
+import unicodedata
+from urllib.parse import quote
+from flask import Flask, Response, render_template, request, make_response, jsonify, send_file, url_for
 import pdfkit  # biblioteka do generowania PDF
+import numpy as np
+from batch import parse_integer, parse_number, run_batch, ndjson_lines
+from sweep import run_sweep, columns_to_json, columns_to_csv
+from uncertainty import run_uncertainty
+from export import (HOURLY_FIELDS, MONTHLY_FIELDS, BATCH_COLUMNS, COLUMNAR_MIMETYPE, hourly_rows, monthly_rows,
+                    csv_lines, columnar_blocks)
+from projection import run_projection
+from sizing import parse_catalogue, parse_options, run_sizing
+from pdf_jobs import PdfJobQueue, QueueFull
+from pdf_cache import PdfCache, cache_key
+from metrics import Metrics
+from data_store import load_cities, load_translations
+from climate import ReferenceYearCache, blend_reference_years
+from spatial import StationIndex, idw_weights
+from station_store import StationStore
+from operating_calendar import days_mask, operating_hours
+from engine import EMISSION_FACTOR, year_index, weekly_averages, monthly_averages, monthly_energy, annual_totals
 
 app = Flask(__name__)
 APP_VERSION = "9.1"  # Zaktualizowana wersja
@@ -19,28 +38,61 @@ weekday_map = {
     "Thursday": 3, "Friday": 4, "Saturday": 5, "Sunday": 6
 }
 
-YEAR = 2025
-EMISSION_FACTOR = 0.233  # kg CO₂/kWh
+YEAR = int(os.environ.get("REFERENCE_YEAR", "2025"))
 
 # Pliki danych
-CITIES_FILE = "cities.txt"
-TRANSLATIONS_FILE = "translations.txt"
+# Ścieżki względem katalogu aplikacji, niezależnie od katalogu roboczego
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CITIES_FILE = os.path.join(BASE_DIR, "cities.txt")
+TRANSLATIONS_FILE = os.path.join(BASE_DIR, "translations.txt")
+COMPILED_DATA_DIR = os.environ.get("COMPILED_DATA_DIR", os.path.join(BASE_DIR, ".compiled"))
 
 def load_cities_data():
-    if not os.path.exists(CITIES_FILE):
-        raise Exception(f"Plik {CITIES_FILE} nie istnieje. Utwórz go zgodnie z instrukcjami.")
-    with open(CITIES_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_cities(CITIES_FILE, COMPILED_DATA_DIR)
 
-cities_data = load_cities_data()
-
-def load_translations():
-    if not os.path.exists(TRANSLATIONS_FILE):
-        raise Exception(f"Plik {TRANSLATIONS_FILE} nie istnieje. Utwórz go zgodnie z instrukcjami.")
-    with open(TRANSLATIONS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+def build_station_index(cities):
+    return StationIndex(cities.names, cities.lats, cities.lons)
 
-translations_data = load_translations()
+cities_data = load_cities_data()
+cities_mtime = os.stat(CITIES_FILE).st_mtime_ns
+station_index = build_station_index(cities_data)
+
+# Cache lat referencyjnych (miasto, rok) – rozmiar i rozgrzewanie z env
+reference_cache = ReferenceYearCache(maxsize=int(os.environ.get("REFYEAR_CACHE_SIZE", "64")))
+
+def refresh_cities_data():
+    # Po zmianie cities.txt przeładowujemy dane i czyścimy cache
+    global cities_data, cities_mtime, station_index
+    try:
+        mtime = os.stat(CITIES_FILE).st_mtime_ns
+    except OSError:
+        return cities_data
+    if mtime != cities_mtime:
+        cities_data = load_cities_data()
+        cities_mtime = mtime
+        station_index = build_station_index(cities_data)
+        reference_cache.clear()
+        cached_calculation.cache_clear()
+    return cities_data
+
+# Rzeczywiste dane godzinowe (TMY) z magazynu station_store zamiast syntezy z cities.txt
+station_store = StationStore(os.environ["STATION_STORE"]) if os.environ.get("STATION_STORE") else None
+if station_store is not None:
+    reference_cache = ReferenceYearCache(maxsize=reference_cache.maxsize, build=station_store.reference_year)
+
+def warm_reference_cache():
+    # REFYEAR_WARMUP_CITIES: lista najczęstszych stacji (po przecinku); bez niej pierwsze
+    # miasta z cities.txt – w obu przypadkach najwyżej tyle, ile mieści cache
+    hot = [name.strip() for name in os.environ.get("REFYEAR_WARMUP_CITIES", "").split(",") if name.strip()]
+    if station_store is None:
+        reference_cache.warm_up(refresh_cities_data(), YEAR, hot or None)
+    elif hot:
+        reference_cache.warm_up({name: name for name in hot if name in station_store}, YEAR)
+
+def load_translations_data():
+    return load_translations(TRANSLATIONS_FILE, COMPILED_DATA_DIR)
+
+translations_data = load_translations_data()
 
 def translate(text_key, lang, **kwargs):
     trans = translations_data.get(lang, translations_data["English"])
@@ -53,6 +105,41 @@ def translate(text_key, lang, **kwargs):
 def inject_translate():
     return dict(translate=translate)
 
+# Asynchroniczne generowanie PDF – pula procesów, limit kolejki i czas życia wyników
+pdf_jobs = PdfJobQueue(
+    os.environ.get("PDF_JOBS_DIR", os.path.join(tempfile.gettempdir(), "aircurtain_pdf_jobs")),
+    workers=int(os.environ.get("PDF_WORKERS", "2")),
+    queue_limit=int(os.environ.get("PDF_QUEUE_LIMIT", "16")),
+    timeout=int(os.environ.get("PDF_TIMEOUT", "60")),
+    ttl=int(os.environ.get("PDF_RESULT_TTL", "600")),
+)
+
+# Cache gotowych raportów PDF (klucz: dane formularza, wersja, szablon)
+pdf_cache = PdfCache(
+    os.environ.get("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "aircurtain_pdf_cache")),
+    max_bytes=int(os.environ.get("PDF_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+)
+
+def pdf_report_key(form):
+    try:
+        template_mtime = os.stat(os.path.join(app.root_path, app.template_folder, "pdf_report.html")).st_mtime_ns
+    except OSError:
+        template_mtime = 0
+    return cache_key(form.to_dict(flat=False), APP_VERSION, template_mtime)
+
+# Metryki etapów i żądań (/metrics, nagłówek Server-Timing) – włączane przez METRICS_ENABLED=1;
+# z METRICS_DIR /metrics sumuje migawki wszystkich workerów gunicorna
+metrics = Metrics(enabled=os.environ.get("METRICS_ENABLED") == "1", directory=os.environ.get("METRICS_DIR") or None)
+metrics.init_app(app)
+metrics.register("aircurtain_cache_hits_total", "counter", "Cache hits", lambda: [
+    ((("cache", "reference_year"),), reference_cache.hits), ((("cache", "pdf"),), pdf_cache.hits),
+    ((("cache", "calculation"),), cached_calculation.cache_info().hits)])
+metrics.register("aircurtain_cache_misses_total", "counter", "Cache misses", lambda: [
+    ((("cache", "reference_year"),), reference_cache.misses), ((("cache", "pdf"),), pdf_cache.misses),
+    ((("cache", "calculation"),), cached_calculation.cache_info().misses)])
+metrics.register("aircurtain_pdf_queue_depth", "gauge", "PDF jobs queued or running",
+                 lambda: [((), pdf_jobs.depth())])
+
 languages = list(translations_data.keys())
 currencies = ["EUR"]
 
@@ -78,90 +165,286 @@ def smooth_data(data, window=3):
         smoothed.append(round(sum(data[start:end]) / (end - start), 1))
     return smoothed
 
-# Nowa funkcja – najpierw obliczamy średnie dzienne, potem grupujemy według tygodnia
-def compute_weekly_averages_from_daily(hourly_data):
-    daily = {}
-    for dt, value in hourly_data:
-        day = dt.date()
-        daily.setdefault(day, []).append(value)
-    daily_avg = {day: sum(values) / len(values) for day, values in daily.items()}
-    weekly = {}
-    for day, avg in daily_avg.items():
-        week = day.isocalendar()[1]
-        weekly.setdefault(week, []).append(avg)
-    weekly_avg = {week: round(sum(values) / len(values), 1) for week, values in weekly.items()}
-    weeks = sorted(weekly_avg.keys())
-    avg = [weekly_avg[w] for w in weeks]
-    return json.dumps({"weeks": weeks, "avg": avg})
-
-def get_reference_hourly_data_for_location(user_lat, user_lon):
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 6371
-        phi1, phi2 = math.radians(lat1), math.radians(lat2)
-        delta_phi = math.radians(lat2 - lat1)
-        delta_lambda = math.radians(lon2 - lon1)
-        a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
-
-    def find_nearest_city(user_lat, user_lon, cities):
-        nearest_city = None
-        min_dist = float('inf')
-        for city, info in cities.items():
-            dist = haversine(user_lat, user_lon, info["lat"], info["lon"])
-            if dist < min_dist:
-                min_dist = dist
-                nearest_city = city
-        return nearest_city, cities[nearest_city]
-
-    chosen_city, city_info = find_nearest_city(user_lat, user_lon, cities_data)
-    baseline = city_info["baseline"]
-    amp = city_info["amplitude"]
-    wind_baseline = city_info.get("wind_baseline")
-    wind_amp = city_info.get("wind_amplitude")
-    
-    temp_data = {}
-    wind_data = {}
-    A_day_temp = 1.0
-    A_day_wind = 0.5
-    for m in range(1, 13):
-        num_days = calendar.monthrange(YEAR, m)[1]
-        temp_data[m] = {}
-        wind_data[m] = {}
-        offset = num_days / 2.0
-        for day in range(1, num_days + 1):
-            temp_data[m][day] = {}
-            wind_data[m][day] = {}
-            daily_temp = baseline[m-1] + A_day_temp * math.sin(2 * math.pi * (day - offset) / num_days)
-            daily_wind = wind_baseline[m-1] + A_day_wind * math.sin(2 * math.pi * (day - offset) / num_days)
-            for hour in range(24):
-                temp_hourly = daily_temp + amp[m-1] * math.sin(2 * math.pi * (hour - 6) / 24)
-                wind_hourly = daily_wind + wind_amp[m-1] * math.sin(2 * math.pi * (hour - 6) / 24)
-                temp_data[m][day][hour] = round(temp_hourly, 1)
-                wind_data[m][day][hour] = round(wind_hourly, 1)
-    return temp_data, wind_data, chosen_city, amp
-
-def generate_hourly_reference_year(ref_data):
-    hourly_data = []
-    for m in range(1, 13):
-        num_days = calendar.monthrange(YEAR, m)[1]
-        for day in range(1, num_days + 1):
-            for hour in range(24):
-                dt = datetime.datetime(YEAR, m, day, hour, 0)
-                temp = ref_data[m][day].get(hour)
-                hourly_data.append((dt, temp))
-    return hourly_data
-
-def generate_hourly_wind_year(wind_data):
-    hourly_wind = []
+# Górna granica liczby stacji do interpolacji – każda to osobny rok referencyjny w cache
+MAX_STATIONS = 8
+
+def parse_stations(value):
+    stations = parse_integer(value, "stations")
+    if not 1 <= stations <= MAX_STATIONS:
+        raise ValueError(f"stations must be between 1 and {MAX_STATIONS}")
+    return stations
+
+def get_reference_year_for_location(user_lat, user_lon, stations=1, year=YEAR):
+    # stations > 1: interpolacja odwrotnej odległości między najbliższymi stacjami
+    if station_store is not None:
+        index, sources = station_store.index, None
+    else:
+        sources = refresh_cities_data()
+        index = station_index
+    with metrics.stage("nearest_station"):
+        nearest = index.query(user_lat, user_lon, k=max(1, stations))
+    chosen_city = nearest[0][0]
+    with metrics.stage("reference_year"):
+        refs = [reference_cache.get(city, city if sources is None else sources[city], year) for city, _ in nearest]
+        if len(refs) == 1:
+            ref = refs[0]
+        else:
+            ref = blend_reference_years(refs, idw_weights([dist for _, dist in nearest]))
+    return ref, chosen_city, ref.amplitude
+
+def locate_station(lat, lng):
+    # Rok referencyjny i stacja dla drzwi w run_batch i run_sizing
+    ref, chosen_city, amp = get_reference_year_for_location(lat, lng)
+    return ref, chosen_city
+
+class InputError(ValueError):
+    pass
+
+def canonical_inputs(params):
+    # Znormalizowane wejścia obliczeń (formularz, query string albo JSON) – klucz cache i ETag
+    def get_list(name):
+        if hasattr(params, "getlist"):
+            return params.getlist(name)
+        values = params.get(name) or []
+        return [values] if isinstance(values, str) else list(values)
+
+    if params.get("lat") in (None, "") or params.get("lng") in (None, ""):
+        raise InputError("Missing data: please select a location on the map.")
+    try:
+        lat = parse_number(params.get("lat"), "lat")
+        lng = parse_number(params.get("lng"), "lng")
+    except (TypeError, ValueError) as e:
+        raise InputError(f"Invalid coordinates: {e}")
+    if not -90 <= lat <= 90:
+        raise InputError("Invalid coordinates: lat must be between -90 and 90")
+    try:
+        stations = parse_stations(params.get("stations", "1"))
+    except ValueError as e:
+        raise InputError(f"Invalid number of stations: {e}")
+
+    def number(name, default=None):
+        try:
+            return parse_number(params.get(name, default), name)
+        except (TypeError, ValueError) as e:
+            raise InputError(f"Invalid {name}: {e}")
+
+    inputs = {
+        "lat": lat,
+        "lng": lng,
+        "stations": stations,
+        "energyCost": round(number("energyCost", "0.25"), 2),
+        "windiness": str(params.get("windiness", "4")),
+        "width": number("width"),
+        "height": number("height"),
+        "curtainFlow": number("curtainFlow"),
+        "motorPower": number("motorPower", "0.3"),
+        "curtainPrice": number("curtainPrice", "1100"),
+        "indoorTempWinter": number("indoorTempWinter", "18"),
+        "indoorTempSummer": number("indoorTempSummer", "22"),
+        "exploitationIntensity": number("exploitationIntensity", "0.15"),
+    }
+    operating_days = set(get_list("operatingDays")) or set(weekday_map)
+    inputs["operatingDays"] = [day for day in weekday_map if day in operating_days]
+
+    try:
+        times = [(int(value.split(":")[0]), int(value.split(":")[1]))
+                 for value in (params.get("openTime"), params.get("closeTime"))]
+        if times[1][0] + times[1][1] / 60.0 <= times[0][0] + times[0][1] / 60.0:
+            raise InputError("Closing time must be later than opening time.")
+    except InputError:
+        raise
+    except Exception as e:
+        raise InputError(f"Unable to parse times: {e}")
+    inputs["openTime"], inputs["closeTime"] = (f"{h:02d}:{m:02d}" for h, m in times)
+    return inputs
+
+def calculation_key(inputs):
+    return json.dumps({"version": APP_VERSION, "inputs": inputs}, sort_keys=True, separators=(",", ":"))
+
+def calculate(inputs):
+    # Pełne obliczenie dla jednego zestawu wejść; wynik jest współdzielony przez cache – tylko do odczytu
+    ref, chosen_city, amp = get_reference_year_for_location(inputs["lat"], inputs["lng"], inputs["stations"])
+    if np.isnan(ref.temp).all():
+        return None
+    yi = year_index(YEAR)
+
+    # Wygładzamy dane obu wykresów, aby uniknąć efektu "piły"
+    with metrics.stage("weekly_averages"):
+        weeks, weekly_temp = weekly_averages(ref.temp, yi)
+        weekly_chart = {"weeks": weeks, "avg": smooth_data(weekly_temp, window=3)}
+        weeks, weekly_wind = weekly_averages(ref.wind, yi)
+        weekly_wind_chart = {"weeks": weeks, "avg": smooth_data(weekly_wind, window=3)}
+
+    energy_cost = inputs["energyCost"]
+    wind_multiplier = wind_scale.get(inputs["windiness"], 1.0)
+    width = inputs["width"]
+    height = inputs["height"]
+    curtain_flow_m3s = inputs["curtainFlow"] / 3600.0
+    motor_power = inputs["motorPower"]
+    curtain_price = inputs["curtainPrice"]
+    indoor_temp_winter = inputs["indoorTempWinter"]
+    indoor_temp_summer = inputs["indoorTempSummer"]
+    exploitation_intensity = inputs["exploitationIntensity"]
+    open_hour, close_hour = (int(value.split(":")[0]) + int(value.split(":")[1]) / 60.0
+                             for value in (inputs["openTime"], inputs["closeTime"]))
+    operating_period_duration = close_hour - open_hour
+
+    mask = days_mask(inputs["operatingDays"])
+    monthly_operating_hours = operating_hours(YEAR, mask, operating_period_duration)
+    effective_monthly_hours = [int(round(h * exploitation_intensity)) for h in monthly_operating_hours]
+
+    # Obliczenia dla temperatury i wiatru
+    with metrics.stage("monthly_averages"):
+        monthly_avg_temps, operating_avgs = monthly_averages(ref.temp, yi, open_hour, close_hour)
+        monthly_avg_wind, operating_avg_wind = monthly_averages(ref.wind, yi, open_hour, close_hour)
+    temp_table = []
     for m in range(1, 13):
-        num_days = calendar.monthrange(YEAR, m)[1]
-        for day in range(1, num_days + 1):
-            for hour in range(24):
-                dt = datetime.datetime(YEAR, m, day, hour, 0)
-                wind = wind_data[m][day].get(hour)
-                hourly_wind.append((dt, wind))
-    return hourly_wind
+        full_avg = monthly_avg_temps[m-1]
+        op_avg = operating_avgs[m-1]
+        wind_avg = monthly_avg_wind[m-1]
+        op_wind_avg = operating_avg_wind[m-1]
+        amp_value = amp[m-1]
+        if full_avg is None or op_avg is None or op_wind_avg is None:
+            temp_table.append({
+                "month": months[m-1],
+                "monthly_avg": "No data",
+                "wind_avg": "No data",
+                "operating_avg": "No data",
+                "operating_wind": "No data",
+                "indoor_temp": "No data",
+                "season_info": f"Amplitude: {amp_value}°C"
+            })
+        else:
+            if op_avg < indoor_temp_winter:
+                chosen_indoor = indoor_temp_winter
+                season_info = "Automatic: winter season selected"
+            elif op_avg > indoor_temp_summer:
+                chosen_indoor = indoor_temp_summer
+                season_info = "Automatic: summer season selected"
+            else:
+                chosen_indoor = op_avg
+                season_info = "Transitional season"
+            season_info += f" (Temp Amplitude: {amp_value}°C)"
+            temp_table.append({
+                "month": months[m-1],
+                "monthly_avg": f"{full_avg:.1f}",
+                "wind_avg": f"{wind_avg:.1f}",
+                "operating_avg": f"{op_avg:.1f}",
+                "operating_wind": f"{op_wind_avg:.1f}",
+                "indoor_temp": f"{chosen_indoor:.1f}",
+                "season_info": season_info
+            })
+
+    # Energy and carbon calculations – uwzględniamy wpływ wiatru
+    if all(val is not None for val in operating_avgs):
+        with metrics.stage("energy_model"):
+            energy = monthly_energy(operating_avgs, effective_monthly_hours, width, height,
+                                    curtain_flow_m3s, motor_power, wind_multiplier,
+                                    indoor_temp_winter, indoor_temp_summer)
+            totals = annual_totals(energy, energy_cost, curtain_price)
+        energy_without = totals["energy_without"].tolist()
+        energy_with = totals["energy_with"].tolist()
+        motor_energy_list = totals["motor_energy"].tolist()
+        monthly_savings = np.rint(energy["savings"]).astype(np.int64).tolist()
+        monthly_carbon_savings = [round(s * EMISSION_FACTOR, 1) for s in energy["savings"].tolist()]
+        total_energy_without = int(totals["annual_energy_without"])
+        total_energy_with = int(totals["annual_energy_with"])
+        annual_motor_energy = int(totals["annual_motor_energy"])
+        annual_energy_with_motor = int(totals["annual_energy_with_motor"])
+        annual_cost_without = int(totals["annual_cost_without"])
+        annual_cost_with = int(totals["annual_cost_with"])
+        annual_cost_motor = int(totals["annual_cost_motor"])
+        annual_cost_with_motor = int(totals["annual_cost_with_motor"])
+        annual_savings_energy = int(totals["annual_savings_energy"])
+        annual_savings_cost = int(totals["annual_savings_cost"])
+        payback_period = (curtain_price / annual_savings_cost) if annual_savings_cost > 0 else None
+        carbon_footprint = round((total_energy_without - annual_energy_with_motor) * EMISSION_FACTOR, 1)
+        result = {
+            "total_savings": int(round(sum(monthly_savings))),
+            "energy_without": energy_without,
+            "energy_with": energy_with,
+            "motor_energy": motor_energy_list,
+            "monthly_carbon_savings": monthly_carbon_savings,
+            "months": months,
+            "monthly_savings": monthly_savings,
+            "monthly_operating_hours": effective_monthly_hours,
+            "annual_energy_without": total_energy_without,
+            "annual_cost_without": f"{annual_cost_without} EUR",
+            "annual_energy_with": total_energy_with,
+            "annual_cost_with": f"{annual_cost_with} EUR",
+            "annual_motor_energy": annual_motor_energy,
+            "annual_cost_motor": f"{annual_cost_motor} EUR",
+            "annual_energy_with_motor": annual_energy_with_motor,
+            "annual_cost_with_motor": f"{annual_cost_with_motor} EUR",
+            "annual_savings_energy": annual_savings_energy,
+            "annual_savings_cost": f"{annual_savings_cost} EUR",
+            "payback_period": payback_period,
+            "carbon_footprint": f"{carbon_footprint} kg CO₂/year"
+        }
+        chart = {
+            "months": months,
+            "without": energy_without,
+            "with": [energy_with[i] + motor_energy_list[i] for i in range(12)]
+        }
+        payback_chart = {
+            "years": list(range(0, 8)),  # 0-7 = 7 years
+            "without": [annual_cost_without * y for y in range(0, 8)],
+            "with": [curtain_price + (annual_cost_with_motor * y) for y in range(0, 8)],
+            "payback": payback_period
+        }
+    else:
+        result = {
+            "total_savings": "No data",
+            "energy_without": "No data",
+            "energy_with": "No data",
+            "motor_energy": "No data",
+            "monthly_carbon_savings": "No data",
+            "months": months,
+            "monthly_savings": "No data",
+            "monthly_operating_hours": effective_monthly_hours,
+            "annual_energy_without": "No data",
+            "annual_cost_without": "No data",
+            "annual_energy_with": "No data",
+            "annual_cost_with": "No data",
+            "annual_motor_energy": "No data",
+            "annual_cost_motor": "No data",
+            "annual_energy_with_motor": "No data",
+            "annual_cost_with_motor": "No data",
+            "annual_savings_energy": "No data",
+            "annual_savings_cost": "No data",
+            "payback_period": "No data",
+            "carbon_footprint": "No data"
+        }
+        chart = {
+            "months": months,
+            "without": [],
+            "with": []
+        }
+        payback_chart = {
+            "years": [],
+            "without": [],
+            "with": [],
+            "payback": "No data"
+        }
+
+    result["monthly_wind"] = monthly_avg_wind
+    result["operating_wind"] = operating_avg_wind
+    return {
+        "station": chosen_city,
+        "result": result,
+        "chart": chart,
+        "payback_chart": payback_chart,
+        "weekly_chart": weekly_chart,
+        "weekly_wind_chart": weekly_wind_chart,
+        "temp_table": temp_table,
+    }
+
+# Wyniki obliczeń w LRU: klucz = kanoniczne wejścia + APP_VERSION
+@functools.lru_cache(maxsize=int(os.environ.get("CALC_CACHE_SIZE", "256")))
+def cached_calculation(key):
+    return calculate(json.loads(key)["inputs"])
+
+CALC_MAX_AGE = int(os.environ.get("CALC_MAX_AGE", "3600"))
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -175,272 +458,254 @@ def index():
     selected_language = "English"
 
     if request.method == "POST":
-        lat_val = request.form.get("lat")
-        lng_val = request.form.get("lng")
-        if not lat_val or not lng_val:
+        if not request.form.get("lat") or not request.form.get("lng"):
             return "<script>alert('Missing data: please select a location on the map.');document.getElementById('map').scrollIntoView({behavior: 'smooth'});window.history.back();</script>", 400
         try:
-            user_lat = float(lat_val)
-            user_lon = float(lng_val)
-        except ValueError as e:
-            return f"Error: Invalid coordinates: {e}", 400
-
+            inputs = canonical_inputs(request.form)
+        except InputError as e:
+            return f"Error: {e}", 400
         selected_language = request.form.get("language", "English")
-        temp_data, wind_data, chosen_city, amp = get_reference_hourly_data_for_location(user_lat, user_lon)
-        chosen_station = chosen_city
-        hourly_temp = generate_hourly_reference_year(temp_data)
-        hourly_wind = generate_hourly_wind_year(wind_data)
-        if all(temp is None for dt, temp in hourly_temp):
+        refresh_cities_data()
+        calculation = cached_calculation(calculation_key(inputs))
+        if calculation is None:
             return "Error: No reference temperature data", 500
+        result = calculation["result"]
+        chosen_station = calculation["station"]
+        temp_table = calculation["temp_table"]
+        chart_data = json.dumps(calculation["chart"])
+        payback_chart_data = json.dumps(calculation["payback_chart"])
+        weekly_chart_data = json.dumps(calculation["weekly_chart"])
+        weekly_wind_chart_data = json.dumps(calculation["weekly_wind_chart"])
+
+    with metrics.stage("render"):
+        return render_template("index.html", result=result, chart_data=chart_data,
+                               payback_chart_data=payback_chart_data, weekly_chart_data=weekly_chart_data,
+                               weekly_wind_chart_data=weekly_wind_chart_data,
+                               temp_table=temp_table, chosen_station=chosen_station,
+                               version=APP_VERSION, language=selected_language,
+                               languages=languages, currencies=currencies)
+
+@app.route("/api/calculate", methods=["GET", "POST"])
+def api_calculate():
+    # Bezstanowe obliczenie jako JSON; identyczne wejścia -> ten sam ETag (304 bez liczenia)
+    params = request.get_json(silent=True) if request.is_json else None
+    if params is None:
+        params = request.values
+    try:
+        inputs = canonical_inputs(params)
+    except (TypeError, ValueError, AttributeError) as e:
+        return f"Error: Invalid calculation request: {e}", 400
+    refresh_cities_data()
+    key = calculation_key(inputs)
+    # Wynik zależy też od roku referencyjnego i źródła danych klimatycznych
+    source = station_store.version if station_store is not None else cities_mtime
+    etag = hashlib.sha256(f"{key}:{YEAR}:{source}".encode("utf-8")).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        calculation = cached_calculation(key)
+        if calculation is None:
+            return "Error: No reference temperature data", 500
+        response = jsonify(dict(calculation, inputs=inputs, version=APP_VERSION))
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CALC_MAX_AGE
+    return response
 
-        weekly_chart_data = compute_weekly_averages_from_daily(hourly_temp)
-        weekly_wind_chart_data = compute_weekly_averages_from_daily(hourly_wind)
-        # Wygładzamy dane obu wykresów, aby uniknąć efektu "piły"
-        weekly_temp_dict = json.loads(weekly_chart_data)
-        weekly_temp_dict["avg"] = smooth_data(weekly_temp_dict["avg"], window=3)
-        weekly_chart_data = json.dumps(weekly_temp_dict)
-        weekly_wind_dict = json.loads(weekly_wind_chart_data)
-        weekly_wind_dict["avg"] = smooth_data(weekly_wind_dict["avg"], window=3)
-        weekly_wind_chart_data = json.dumps(weekly_wind_dict)
-
-        energy_cost = round(float(request.form.get("energyCost", "0.25")), 2)
-        windiness = request.form.get("windiness", "4")
-        wind_multiplier = wind_scale.get(windiness, 1.0)
-        width = float(request.form.get("width"))
-        height = float(request.form.get("height"))
-        curtain_flow_m3s = float(request.form.get("curtainFlow")) / 3600.0
-        motor_power = float(request.form.get("motorPower", "0.3"))
-        curtain_price = float(request.form.get("curtainPrice", "1100"))
-        indoor_temp_winter = float(request.form.get("indoorTempWinter", "18"))
-        indoor_temp_summer = float(request.form.get("indoorTempSummer", "22"))
-        operating_days = request.form.getlist("operatingDays")
-        open_time_val = request.form.get("openTime")
-        close_time_val = request.form.get("closeTime")
-        exploitation_intensity = float(request.form.get("exploitationIntensity", "0.15"))
-        if not operating_days:
-            operating_days = list(weekday_map.keys())
-
-        try:
-            open_hour = int(open_time_val.split(":")[0]) + int(open_time_val.split(":")[1]) / 60.0
-            close_hour = int(close_time_val.split(":")[0]) + int(close_time_val.split(":")[1]) / 60.0
-            if close_hour <= open_hour:
-                return "Error: Closing time must be later than opening time.", 400
-            operating_period_duration = close_hour - open_hour
-        except Exception as e:
-            return f"Error: Unable to parse times: {e}", 400
-
-        monthly_operating_hours = []
-        for m in range(1, 13):
-            num_operating_days = 0
-            cal = calendar.monthcalendar(YEAR, m)
-            for week in cal:
-                for i, day in enumerate(week):
-                    if day != 0 and list(weekday_map.keys())[i] in operating_days:
-                        num_operating_days += 1
-            monthly_operating_hours.append(num_operating_days * operating_period_duration)
-        effective_monthly_hours = [int(round(h * exploitation_intensity)) for h in monthly_operating_hours]
-
-        # Obliczenia dla temperatury i wiatru
-        monthly_temp = {m: [] for m in range(1, 13)}
-        operating_temp = {m: [] for m in range(1, 13)}
-        monthly_wind = {m: [] for m in range(1, 13)}
-        operating_wind = {m: [] for m in range(1, 13)}
-        for dt, temp in hourly_temp:
-            if temp is None:
-                continue
-            m = dt.month
-            monthly_temp[m].append(temp)
-            t_val = dt.hour + dt.minute/60.0
-            if open_hour <= t_val < close_hour:
-                operating_temp[m].append(temp)
-        for dt, wind in hourly_wind:
-            if wind is None:
-                continue
-            m = dt.month
-            monthly_wind[m].append(wind)
-            t_val = dt.hour + dt.minute/60.0
-            if open_hour <= t_val < close_hour:
-                operating_wind[m].append(wind)
-        monthly_avg_temps = []
-        operating_avgs = []
-        monthly_avg_wind = []
-        operating_avg_wind = []
-        temp_table = []
-        for m in range(1, 13):
-            full_avg = round(sum(monthly_temp[m]) / len(monthly_temp[m]), 1) if monthly_temp[m] else None
-            op_avg = round(sum(operating_temp[m]) / len(operating_temp[m]), 1) if operating_temp[m] else None
-            wind_avg = round(sum(monthly_wind[m]) / len(monthly_wind[m]), 1) if monthly_wind[m] else None
-            op_wind_avg = round(sum(operating_wind[m]) / len(operating_wind[m]), 1) if operating_wind[m] else None
-            monthly_avg_temps.append(full_avg)
-            operating_avgs.append(op_avg)
-            monthly_avg_wind.append(wind_avg)
-            operating_avg_wind.append(op_wind_avg)
-            amp_value = amp[m-1]
-            if full_avg is None or op_avg is None or op_wind_avg is None:
-                temp_table.append({
-                    "month": months[m-1],
-                    "monthly_avg": "No data",
-                    "wind_avg": "No data",
-                    "operating_avg": "No data",
-                    "operating_wind": "No data",
-                    "indoor_temp": "No data",
-                    "season_info": f"Amplitude: {amp_value}°C"
-                })
-            else:
-                if op_avg < indoor_temp_winter:
-                    chosen_indoor = indoor_temp_winter
-                    season_info = "Automatic: winter season selected"
-                elif op_avg > indoor_temp_summer:
-                    chosen_indoor = indoor_temp_summer
-                    season_info = "Automatic: summer season selected"
-                else:
-                    chosen_indoor = op_avg
-                    season_info = "Transitional season"
-                season_info += f" (Temp Amplitude: {amp_value}°C)"
-                temp_table.append({
-                    "month": months[m-1],
-                    "monthly_avg": f"{full_avg:.1f}",
-                    "wind_avg": f"{wind_avg:.1f}",
-                    "operating_avg": f"{op_avg:.1f}",
-                    "operating_wind": f"{op_wind_avg:.1f}",
-                    "indoor_temp": f"{chosen_indoor:.1f}",
-                    "season_info": season_info
-                })
-
-        # Energy and carbon calculations – uwzględniamy wpływ wiatru
-        if all(val is not None for val in operating_avgs):
-            energy_without = []
-            energy_with = []
-            monthly_savings = []
-            motor_energy_list = []
-            monthly_carbon_savings = []
-            for i in range(1, 13):
-                T_operating = operating_avgs[i-1]
-                if T_operating < indoor_temp_winter:
-                    chosen_indoor = indoor_temp_winter
-                elif T_operating > indoor_temp_summer:
-                    chosen_indoor = indoor_temp_summer
-                else:
-                    chosen_indoor = T_operating
-                deltaT = abs(chosen_indoor - T_operating)
-                T_inside_K = chosen_indoor + 273.15
-                delta_p = 1.2 * 9.81 * height * (deltaT / T_inside_K)
-                A_area = width * height
-                Q_natural = 0.6 * A_area * math.sqrt((2 * delta_p) / 1.2)
-                Q_corrected = Q_natural * wind_multiplier
-                W_no = Q_corrected * 1.2 * 1005 * deltaT
-                E_no = (W_no / 1000) * effective_monthly_hours[i-1]
-                eta = min(curtain_flow_m3s / Q_corrected, 1.0) if Q_corrected > 0 else 0
-                Q_effective = Q_corrected * (1 - eta)
-                W_curtain = Q_effective * 1.2 * 1005 * deltaT
-                E_curtain = (W_curtain / 1000) * effective_monthly_hours[i-1]
-                savings = E_no - E_curtain
-                motor_energy = effective_monthly_hours[i-1] * motor_power
-                motor_energy_list.append(int(round(motor_energy)))
-                energy_without.append(int(round(E_no)))
-                energy_with.append(int(round(E_curtain)))
-                monthly_savings.append(int(round(savings)))
-                monthly_carbon = round(savings * EMISSION_FACTOR, 1)
-                monthly_carbon_savings.append(monthly_carbon)
-            annual_motor_energy = sum(motor_energy_list)
-            total_energy_without = sum(energy_without)
-            total_energy_with = sum(energy_with)
-            annual_energy_with_motor = total_energy_with + annual_motor_energy
-            annual_cost_without = int(round(total_energy_without * energy_cost))
-            annual_cost_with = int(round(total_energy_with * energy_cost))
-            annual_cost_motor = int(round(annual_motor_energy * energy_cost))
-            annual_cost_with_motor = annual_cost_with + annual_cost_motor
-            annual_savings_energy = int(round(total_energy_without - annual_energy_with_motor))
-            annual_savings_cost = int(round(annual_cost_without - annual_cost_with_motor))
-            payback_period = (curtain_price / annual_savings_cost) if annual_savings_cost > 0 else None
-            carbon_footprint = round((total_energy_without - annual_energy_with_motor) * EMISSION_FACTOR, 1)
-            result = {
-                "total_savings": int(round(sum(monthly_savings))),
-                "energy_without": energy_without,
-                "energy_with": energy_with,
-                "motor_energy": motor_energy_list,
-                "monthly_carbon_savings": monthly_carbon_savings,
-                "months": months,
-                "monthly_savings": monthly_savings,
-                "monthly_operating_hours": effective_monthly_hours,
-                "annual_energy_without": total_energy_without,
-                "annual_cost_without": f"{annual_cost_without} EUR",
-                "annual_energy_with": total_energy_with,
-                "annual_cost_with": f"{annual_cost_with} EUR",
-                "annual_motor_energy": annual_motor_energy,
-                "annual_cost_motor": f"{annual_cost_motor} EUR",
-                "annual_energy_with_motor": annual_energy_with_motor,
-                "annual_cost_with_motor": f"{annual_cost_with_motor} EUR",
-                "annual_savings_energy": annual_savings_energy,
-                "annual_savings_cost": f"{annual_savings_cost} EUR",
-                "payback_period": payback_period,
-                "carbon_footprint": f"{carbon_footprint} kg CO₂/year"
-            }
-            chart_data = json.dumps({
-                "months": months,
-                "without": energy_without,
-                "with": [energy_with[i] + motor_energy_list[i] for i in range(12)]
-            })
-            payback_chart_data = json.dumps({
-                "years": list(range(0, 8)),  # 0-7 = 7 years
-                "without": [annual_cost_without * y for y in range(0, 8)],
-                "with": [1100 + (annual_cost_with_motor * y) for y in range(0, 8)],
-                "payback": payback_period
-            })
-        else:
-            result = {
-                "total_savings": "No data",
-                "energy_without": "No data",
-                "energy_with": "No data",
-                "motor_energy": "No data",
-                "monthly_carbon_savings": "No data",
-                "months": months,
-                "monthly_savings": "No data",
-                "monthly_operating_hours": effective_monthly_hours,
-                "annual_energy_without": "No data",
-                "annual_cost_without": "No data",
-                "annual_energy_with": "No data",
-                "annual_cost_with": "No data",
-                "annual_motor_energy": "No data",
-                "annual_cost_motor": "No data",
-                "annual_energy_with_motor": "No data",
-                "annual_cost_with_motor": "No data",
-                "annual_savings_energy": "No data",
-                "annual_savings_cost": "No data",
-                "payback_period": "No data",
-                "carbon_footprint": "No data"
-            }
-            chart_data = json.dumps({
-                "months": months,
-                "without": [],
-                "with": []
-            })
-            payback_chart_data = json.dumps({
-                "years": [],
-                "without": [],
-                "with": [],
-                "payback": "No data"
-            })
+@app.route("/api/batch", methods=["POST"])
+def batch_calculate():
+    # Wiele drzwi w jednym zapytaniu – wyniki strumieniowane jako NDJSON
+    payload = request.get_json(silent=True)
+    doors = payload.get("doors") if isinstance(payload, dict) else payload
+    if not isinstance(doors, list):
+        return 'Error: Expected a JSON list of doors or {"doors": [...]}', 400
+
+    rows = run_batch(doors, locate_station, year_index(YEAR), wind_scale)
+    return Response(ndjson_lines(rows), mimetype="application/x-ndjson")
+
+@app.route("/api/sweep", methods=["POST"])
+def sweep_calculate():
+    # Analiza wrażliwości: siatka parametrów liczona na jednym roku referencyjnym
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("base"), dict) \
+            or not isinstance(payload.get("grid", {}), dict):
+        return 'Error: Expected {"base": {...}, "grid": {...}}', 400
+    base = payload["base"]
+    try:
+        ref, chosen_city, amp = get_reference_year_for_location(float(base["lat"]), float(base["lng"]))
+        columns = run_sweep(base, payload.get("grid", {}), ref, year_index(YEAR), wind_scale)
+    except (KeyError, TypeError, ValueError) as e:
+        return f"Error: Invalid sweep: {e}", 400
+    if request.args.get("format", payload.get("format", "json")) == "csv":
+        return Response(columns_to_csv(columns), mimetype="text/csv")
+    return Response(columns_to_json(columns, chosen_city), mimetype="application/json")
+
+def attachment_header(filename):
+    # Nagłówki HTTP są w latin-1: nazwa ASCII dla starszych klientów i pełna w filename* (RFC 5987)
+    fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    fallback = fallback.replace('"', "").replace("\\", "")
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+def export_response(fields, rows, fmt, filename):
+    # Strumieniowanie generatorem – pamięć stała, pierwsze bajty wychodzą od razu
+    if fmt == "csv":
+        body, mimetype, extension = csv_lines(fields, rows), "text/csv", "csv"
+    elif fmt == "ndjson":
+        body, mimetype, extension = ndjson_lines(rows), "application/x-ndjson", "ndjson"
+    else:
+        return f"Error: Unsupported export format: {fmt}", 400
+    response = Response(body, mimetype=mimetype)
+    response.headers["Content-Disposition"] = attachment_header(f"{filename}.{extension}")
+    return response
 
-        result["monthly_wind"] = monthly_avg_wind
-        result["operating_wind"] = operating_avg_wind
+@app.route("/export/hourly", methods=["GET", "POST"])
+def export_hourly():
+    # Godzinowy rok referencyjny (temperatura, wiatr) dla lokalizacji
+    params = request.get_json(silent=True) or request.values
+    try:
+        ref, chosen_city, amp = get_reference_year_for_location(
+            parse_number(params["lat"], "lat"), parse_number(params["lng"], "lng"),
+            parse_stations(params.get("stations", 1)))
+    except (KeyError, TypeError, ValueError) as e:
+        return f"Error: Invalid export request: {e}", 400
+    fmt = request.args.get("format", params.get("format", "csv"))
+    return export_response(HOURLY_FIELDS, hourly_rows(ref, YEAR), fmt, f"hourly_{chosen_city}_{YEAR}")
+
+@app.route("/export/monthly", methods=["POST"])
+def export_monthly():
+    # Miesięczne wyniki modelu energii dla jednych drzwi (konfiguracja jak w /api/batch)
+    config = request.get_json(silent=True)
+    if not isinstance(config, dict):
+        return "Error: Expected a JSON door configuration", 400
+    try:
+        ref, chosen_city, amp = get_reference_year_for_location(float(config["lat"]), float(config["lng"]))
+        rows = monthly_rows(config, ref, year_index(YEAR), wind_scale)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return f"Error: Invalid export request: {e}", 400
+    fmt = request.args.get("format", config.get("format", "csv"))
+    return export_response(MONTHLY_FIELDS, rows, fmt, f"monthly_{chosen_city}_{YEAR}")
+
+@app.route("/export/batch", methods=["POST"])
+def export_batch():
+    # Wyniki wielu drzwi: format kolumnowy (domyślnie), CSV albo NDJSON
+    payload = request.get_json(silent=True)
+    doors = payload.get("doors") if isinstance(payload, dict) else payload
+    if not isinstance(doors, list):
+        return 'Error: Expected a JSON list of doors or {"doors": [...]}', 400
+    fmt = request.args.get("format", payload.get("format", "columnar") if isinstance(payload, dict) else "columnar")
+
+    rows = run_batch(doors, locate_station, year_index(YEAR), wind_scale)
+    if fmt != "columnar":
+        fields = [name for name, dtype in BATCH_COLUMNS]
+        return export_response(fields, (row for row in rows if "fleet" not in row), fmt, f"batch_{YEAR}")
+    response = Response(columnar_blocks(rows), mimetype=COLUMNAR_MIMETYPE)
+    response.headers["Content-Disposition"] = attachment_header(f"batch_{YEAR}.cols")
+    return response
 
-    return render_template("index.html", result=result, chart_data=chart_data,
-                           payback_chart_data=payback_chart_data, weekly_chart_data=weekly_chart_data,
-                           weekly_wind_chart_data=weekly_wind_chart_data,
-                           temp_table=temp_table, chosen_station=chosen_station,
-                           version=APP_VERSION, language=selected_language,
-                           languages=languages, currencies=currencies)
+@app.route("/api/projection", methods=["POST"])
+def projection_calculate():
+    # Projekcja wieloletnia: kalendarz per rok, ocieplenie, ceny energii i spadek emisyjności sieci
+    config = request.get_json(silent=True)
+    if not isinstance(config, dict):
+        return "Error: Expected a JSON door configuration with a \"projection\" object", 400
+    try:
+        lat, lng = float(config["lat"]), float(config["lng"])
+        stations = parse_stations(config.get("stations", 1))
+        chosen = []
+
+        def locate(year):
+            ref, chosen_city, amp = get_reference_year_for_location(lat, lng, stations, year)
+            chosen.append(chosen_city)
+            return ref
+
+        result = run_projection(config, locate, YEAR, wind_scale)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return f"Error: Invalid projection request: {e}", 400
+    result["station"] = chosen[0]
+    return jsonify(result)
+
+@app.route("/api/sizing", methods=["POST"])
+def sizing_calculate():
+    # Dobór kurtyny z katalogu: ranking wg zwrotu, NPV i CO₂ oraz front Pareto, NDJSON na drzwi
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("doors"), list):
+        return 'Error: Expected {"doors": [...], "catalogue": [...]}', 400
+    try:
+        catalogue = parse_catalogue(payload.get("catalogue"))
+        annuity, top = parse_options(payload)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return f"Error: Invalid sizing request: {e}", 400
+
+    rows = run_sizing(payload["doors"], catalogue, locate_station, year_index(YEAR), wind_scale, annuity, top)
+    return Response(ndjson_lines(rows), mimetype="application/x-ndjson")
+
+@app.route("/api/uncertainty", methods=["POST"])
+def uncertainty_calculate():
+    # Monte Carlo: percentyle P10/P50/P90 i histogramy dla oszczędności, zwrotu i CO₂
+    config = request.get_json(silent=True)
+    if not isinstance(config, dict):
+        return "Error: Expected a JSON door configuration with an \"uncertainty\" object", 400
+    try:
+        ref, chosen_city, amp = get_reference_year_for_location(float(config["lat"]), float(config["lng"]))
+        result = run_uncertainty(config, ref, year_index(YEAR), wind_scale)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return f"Error: Invalid uncertainty request: {e}", 400
+    result["station"] = chosen_city
+    return jsonify(result)
 
 @app.route("/generate_pdf", methods=["POST"])
 def generate_pdf():
-    report_data = request.form.to_dict()
-    rendered = render_template("pdf_report.html", data=report_data)
-    pdf = pdfkit.from_string(rendered, False)
-    response = make_response(pdf)
-    response.headers["Content-Type"] = "application/pdf"
-    response.headers["Content-Disposition"] = "attachment; filename=raport.pdf"
-    return response
+    key = pdf_report_key(request.form)
+    if request.if_none_match.contains(key):
+        response = make_response("", 304)
+        response.set_etag(key)
+        return response
+    path = pdf_cache.get(key)
+    if path is None:
+        report_data = request.form.to_dict()
+        with metrics.stage("pdf_render"):
+            rendered = render_template("pdf_report.html", data=report_data)
+        with metrics.stage("pdf_convert"):
+            pdf = pdfkit.from_string(rendered, False)
+        path = pdf_cache.put(key, pdf)
+    return send_file(path, mimetype="application/pdf", as_attachment=True,
+                     download_name="raport.pdf", etag=key, conditional=True)
+
+@app.route("/pdf_jobs", methods=["POST"])
+def submit_pdf_job():
+    key = pdf_report_key(request.form)
+    path = pdf_cache.get(key)
+    try:
+        if path is not None:
+            job_id = pdf_jobs.submit_finished(path)
+        else:
+            report_data = request.form.to_dict()
+            rendered = render_template("pdf_report.html", data=report_data)
+            job_id = pdf_jobs.submit(rendered, on_done=lambda pdf_path: pdf_cache.put_file(key, pdf_path))
+    except QueueFull as e:
+        response = make_response(f"Error: {e}", 503)
+        response.headers["Retry-After"] = "5"
+        return response
+    return jsonify({
+        "job_id": job_id,
+        "status_url": url_for("pdf_job_status", job_id=job_id),
+        "download_url": url_for("download_pdf_job", job_id=job_id),
+    }), 202
+
+@app.route("/pdf_jobs/<job_id>", methods=["GET"])
+def pdf_job_status(job_id):
+    status = pdf_jobs.status(job_id)
+    if status is None:
+        return "Error: Unknown or expired PDF job", 404
+    return jsonify(status)
+
+@app.route("/pdf_jobs/<job_id>/download", methods=["GET"])
+def download_pdf_job(job_id):
+    path = pdf_jobs.result_path(job_id)
+    if path is None:
+        return "Error: PDF is not ready", 404
+    return send_file(path, mimetype="application/pdf", as_attachment=True, download_name="raport.pdf",
+                     etag=job_id, conditional=True)
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,185 @@
+import datetime
+import json
+import math
+
+import numpy as np
+
+from engine import EMISSION_FACTOR, monthly_averages, monthly_energy, annual_totals
+from operating_calendar import WEEKDAYS, days_mask, operating_hours, weekday_operating_hours
+
+# Ile drzwi liczymy jednym wywołaniem silnika – ogranicza zużycie pamięci
+BATCH_CHUNK = 1000
+
+DEFAULT_SCHEDULE = {
+    "operatingDays": list(WEEKDAYS),
+    "openTime": "08:00",
+    "closeTime": "18:00",
+    "exploitationIntensity": 0.15,
+}
+
+
+def parse_hour(value):
+    hours, minutes = value.split(":")
+    return int(hours) + int(minutes) / 60.0
+
+
+def parse_number(value, name):
+    # float() przyjmuje też "nan" i "inf" – takie wartości psułyby wyniki i sumy floty
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a finite number")
+    return number
+
+
+def parse_integer(value, name):
+    # int(float("inf")) rzuca OverflowError, a int(2.5) po cichu obcina
+    number = parse_number(value, name)
+    if number != int(number):
+        raise ValueError(f"{name} must be a whole number")
+    return int(number)
+
+
+def parse_door(door, wind_scale):
+    schedule = dict(DEFAULT_SCHEDULE, **(door.get("schedule") or {}))
+    open_hour = parse_hour(schedule["openTime"])
+    close_hour = parse_hour(schedule["closeTime"])
+    if close_hour <= open_hour:
+        raise ValueError("Closing time must be later than opening time.")
+    days = schedule["operatingDays"] or DEFAULT_SCHEDULE["operatingDays"]
+    # Opcjonalnie: godziny pracy per dzień tygodnia {"Saturday": 6, ...} i lista świąt
+    weekday_hours = schedule.get("weekdayHours")
+    if weekday_hours is not None:
+        if not isinstance(weekday_hours, dict):
+            raise ValueError('weekdayHours must be an object of weekday names to hours, e.g. {"Saturday": 6}')
+        unknown = set(weekday_hours) - set(WEEKDAYS)
+        if unknown:
+            raise ValueError(f"Unknown weekdays: {sorted(unknown)}")
+        weekday_hours = tuple(parse_number(weekday_hours.get(day, 0), day) for day in WEEKDAYS)
+    return {
+        "lat": parse_number(door["lat"], "lat"),
+        "lng": parse_number(door["lng"], "lng"),
+        "width": parse_number(door["width"], "width"),
+        "height": parse_number(door["height"], "height"),
+        "curtain_flow_m3s": parse_number(door["curtainFlow"], "curtainFlow") / 3600.0,
+        "motor_power": parse_number(door.get("motorPower", 0.3), "motorPower"),
+        "curtain_price": parse_number(door.get("curtainPrice", 1100), "curtainPrice"),
+        "energy_cost": round(parse_number(door.get("energyCost", 0.25), "energyCost"), 2),
+        "wind_multiplier": wind_scale.get(str(door.get("windiness", "4")), 1.0),
+        "indoor_temp_winter": parse_number(door.get("indoorTempWinter", 18), "indoorTempWinter"),
+        "indoor_temp_summer": parse_number(door.get("indoorTempSummer", 22), "indoorTempSummer"),
+        "open_hour": open_hour,
+        "close_hour": close_hour,
+        "days_mask": days_mask(days),
+        "weekday_hours": weekday_hours,
+        "holidays": tuple(datetime.date.fromisoformat(day) for day in schedule.get("holidays") or ()),
+        "intensity": parse_number(schedule["exploitationIntensity"], "exploitationIntensity"),
+    }
+
+
+def door_operating_hours(door, year, duration):
+    if door["weekday_hours"] is not None:
+        return weekday_operating_hours(year, door["weekday_hours"], door["holidays"])
+    return operating_hours(year, door["days_mask"], duration, door["holidays"])
+
+
+def _evaluate_chunk(chunk):
+    # chunk: lista (pozycja, drzwi, średnie temperatury, godziny efektywne)
+    p = {key: np.array([door[key] for _, door, _, _ in chunk])[:, None]
+         for key in ("width", "height", "curtain_flow_m3s", "motor_power", "wind_multiplier",
+                     "indoor_temp_winter", "indoor_temp_summer")}
+    energy = monthly_energy(np.array([avgs for _, _, avgs, _ in chunk]),
+                            np.array([hours for _, _, _, hours in chunk]),
+                            p["width"], p["height"], p["curtain_flow_m3s"], p["motor_power"],
+                            p["wind_multiplier"], p["indoor_temp_winter"], p["indoor_temp_summer"])
+    energy_cost = np.array([door["energy_cost"] for _, door, _, _ in chunk])
+    curtain_price = np.array([door["curtain_price"] for _, door, _, _ in chunk])
+    return annual_totals(energy, energy_cost, curtain_price)
+
+
+class DoorProfiles:
+    # Średnie temperatury w godzinach pracy (raz na stację i okno godzin) oraz
+    # miesięczne godziny pracy (raz na kalendarz i intensywność), wspólne dla wielu drzwi
+
+    def __init__(self, locate, yi):
+        self.locate = locate
+        self.yi = yi
+        self._averages = {}
+        self._hours = {}
+
+    def lookup(self, door):
+        # -> (stacja, średnie miesięczne albo None bez godzin pracy w oknie, godziny pracy)
+        ref, station = self.locate(door["lat"], door["lng"])
+        avg_key = (station, door["open_hour"], door["close_hour"])
+        if avg_key not in self._averages:
+            self._averages[avg_key] = monthly_averages(ref.temp, self.yi, door["open_hour"], door["close_hour"])[1]
+        operating_avgs = self._averages[avg_key]
+        if any(val is None for val in operating_avgs):
+            return station, None, None
+        hours_key = (door["days_mask"], door["weekday_hours"], door["holidays"],
+                     door["close_hour"] - door["open_hour"], door["intensity"])
+        if hours_key not in self._hours:
+            monthly_hours = door_operating_hours(door, self.yi.year, hours_key[3])
+            self._hours[hours_key] = [int(round(h * door["intensity"])) for h in monthly_hours]
+        return station, operating_avgs, self._hours[hours_key]
+
+
+def run_batch(doors, locate, yi, wind_scale):
+    # Generator wyników: jeden słownik na drzwi, na końcu podsumowanie floty.
+    # locate(lat, lng) -> (rok referencyjny, stacja)
+    profiles = DoorProfiles(locate, yi)
+    fleet = {"doors": 0, "errors": 0, "annual_savings_energy": 0, "annual_savings_cost": 0,
+             "curtain_price": 0.0, "carbon_footprint": 0.0}
+
+    def flush(chunk):
+        totals = _evaluate_chunk(chunk)
+        for row, (position, door, _, _) in enumerate(chunk):
+            savings_cost = int(totals["annual_savings_cost"][row])
+            savings_energy = int(totals["annual_savings_energy"][row])
+            carbon = round(savings_energy * EMISSION_FACTOR, 1)
+            fleet["doors"] += 1
+            fleet["annual_savings_energy"] += savings_energy
+            fleet["annual_savings_cost"] += savings_cost
+            fleet["curtain_price"] += door["curtain_price"]
+            fleet["carbon_footprint"] += carbon
+            yield {
+                "index": position,
+                "id": door["id"],
+                "station": door["station"],
+                "annual_energy_without": int(totals["annual_energy_without"][row]),
+                "annual_energy_with_motor": int(totals["annual_energy_with_motor"][row]),
+                "annual_savings_energy": savings_energy,
+                "annual_savings_cost": savings_cost,
+                "payback_period": door["curtain_price"] / savings_cost if savings_cost > 0 else None,
+                "carbon_footprint": carbon,
+            }
+
+    chunk = []
+    for position, raw in enumerate(doors):
+        try:
+            door = parse_door(raw, wind_scale)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            fleet["errors"] += 1
+            yield {"index": position, "error": f"Invalid door configuration: {e}"}
+            continue
+        door["id"] = raw.get("id")
+        door["station"], operating_avgs, hours = profiles.lookup(door)
+        if operating_avgs is None:
+            fleet["errors"] += 1
+            yield {"index": position, "error": "No operating hours in the selected time window"}
+            continue
+        chunk.append((position, door, operating_avgs, hours))
+        if len(chunk) >= BATCH_CHUNK:
+            yield from flush(chunk)
+            chunk = []
+    if chunk:
+        yield from flush(chunk)
+
+    fleet["carbon_footprint"] = round(fleet["carbon_footprint"], 1)
+    fleet["payback_period"] = (fleet["curtain_price"] / fleet["annual_savings_cost"]
+                               if fleet["annual_savings_cost"] > 0 else None)
+    yield {"fleet": fleet}
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
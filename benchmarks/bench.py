@@ -0,0 +1,279 @@
+"""Benchmarki etapów obliczeń i test obciążenia endpointów kalkulatora.
+
+Użycie:
+    python benchmarks/bench.py                       # etapy + test client
+    python benchmarks/bench.py --gunicorn            # dodatkowo lokalny gunicorn
+    python benchmarks/bench.py --output wynik.json --baseline baseline.json
+
+Konwersja PDF jest zastąpiona lokalnym skryptem wkhtmltopdf, więc mierzymy
+kolejkę, cache i obsługę żądań, a nie sam wkhtmltopdf.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_FORM = {
+    "lat": "52.2297", "lng": "21.0122", "energyCost": "0.25", "windiness": "4",
+    "curtainFlow": "2500", "motorPower": "0.3", "curtainPrice": "1100",
+    "width": "1.5", "height": "2.0", "indoorTempWinter": "18", "indoorTempSummer": "22",
+    "exploitationIntensity": "0.15", "openTime": "08:00", "closeTime": "18:00",
+    "operatingDays": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+}
+
+STUB_WKHTMLTOPDF = """#!/bin/sh
+for last; do :; done
+cat > /dev/null
+if [ "$last" = "-" ]; then printf '%%PDF-1.4 stub'; else printf '%%PDF-1.4 stub' > "$last"; fi
+"""
+
+
+def install_pdf_stub(directory):
+    path = os.path.join(directory, "wkhtmltopdf")
+    with open(path, "w") as f:
+        f.write(STUB_WKHTMLTOPDF)
+    os.chmod(path, 0o755)
+    os.environ["PATH"] = directory + os.pathsep + os.environ["PATH"]
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0] * 1000, 4),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "p95_ms": round(samples[int(0.95 * (len(samples) - 1))] * 1000, 4),
+    }
+
+
+def measure(func, repeat):
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_stages(app_module, repeat):
+    import climate
+    import engine
+    from operating_calendar import days_mask, operating_hours
+
+    city = "Warsaw"
+    info = app_module.cities_data[city]
+    year = app_module.YEAR
+    yi = engine.year_index(year)
+    ref = climate.synthesize_reference_year(info, year)
+    _, operating_avgs = engine.monthly_averages(ref.temp, yi, 8, 18)
+    hours = [int(round(h * 0.15)) for h in operating_hours(year, days_mask(range(5)), 10.0)]
+
+    def energy_model():
+        energy = engine.monthly_energy(operating_avgs, hours, 1.5, 2.0, 2500 / 3600.0, 0.3, 1.0, 18.0, 22.0)
+        engine.annual_totals(energy, 0.25, 1100.0)
+
+    def template_render():
+        with app_module.app.test_request_context("/"):
+            app_module.render_template("index.html", result=None, version=app_module.APP_VERSION,
+                                       language="English", languages=app_module.languages,
+                                       currencies=app_module.currencies)
+
+    stages = {
+        "reference_year_synthesis": lambda: climate.synthesize_reference_year(info, year),
+        "reference_year_cached": lambda: app_module.get_reference_year_for_location(52.2297, 21.0122),
+        "nearest_station": lambda: app_module.station_index.query(52.2297, 21.0122),
+        "hourly_expansion": lambda: engine.month_matrix(ref.temp, yi),
+        "weekly_averaging": lambda: engine.weekly_averages(ref.temp, yi),
+        "monthly_aggregation": lambda: engine.monthly_averages(ref.temp, yi, 8, 18),
+        "operating_calendar": lambda: operating_hours(year, days_mask(range(5)), 10.0),
+        "energy_model": energy_model,
+        "template_render": template_render,
+    }
+    return {name: measure(func, repeat) for name, func in stages.items()}
+
+
+def run_load(send, concurrency, requests):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        start = time.perf_counter()
+        ok = send(i)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+    result = summarize(latencies)
+    result.update(errors=errors, throughput_rps=round(requests / wall, 1))
+    return result
+
+
+_unique_reports = itertools.count()
+
+
+def pdf_form(unique):
+    # Unikalne dane = miss w cache PDF, powtarzalne = trafienie
+    return dict(DEFAULT_FORM, report=f"bench-{next(_unique_reports)}" if unique else "bench")
+
+
+def index_form(unique):
+    # Unikalne wejścia omijają cache obliczeń (LRU w app.cached_calculation)
+    return dict(DEFAULT_FORM, curtainPrice=str(1100 + next(_unique_reports))) if unique else DEFAULT_FORM
+
+
+def bench_test_client(app_module, levels, requests):
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = app_module.app.test_client()
+        return local.client
+
+    endpoints = {
+        "index": lambda i: client().post("/", data=DEFAULT_FORM).status_code == 200,
+        "index_miss": lambda i: client().post("/", data=index_form(True)).status_code == 200,
+        "generate_pdf_miss": lambda i: client().post("/generate_pdf", data=pdf_form(True)).status_code == 200,
+        "generate_pdf_hit": lambda i: client().post("/generate_pdf", data=pdf_form(False)).status_code == 200,
+    }
+    return {name: {str(c): run_load(send, c, requests) for c in levels} for name, send in endpoints.items()}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench_gunicorn(levels, requests, workers, tmp):
+    port = free_port()
+    env = dict(os.environ, PDF_CACHE_DIR=os.path.join(tmp, "gunicorn_pdf_cache"),
+               PDF_JOBS_DIR=os.path.join(tmp, "gunicorn_pdf_jobs"))
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app", "-b", f"127.0.0.1:{port}",
+                             "-w", str(workers), "--log-level", "warning"], cwd=ROOT, env=env)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(base + "/", timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("gunicorn did not start")
+
+        def post(path, form):
+            data = urllib.parse.urlencode(form, doseq=True).encode()
+            try:
+                with urllib.request.urlopen(base + path, data=data, timeout=60) as response:
+                    response.read()
+                    return response.status == 200
+            except OSError:
+                return False
+
+        endpoints = {
+            "index": lambda i: post("/", DEFAULT_FORM),
+            "index_miss": lambda i: post("/", index_form(True)),
+            "generate_pdf_miss": lambda i: post("/generate_pdf", pdf_form(True)),
+            "generate_pdf_hit": lambda i: post("/generate_pdf", pdf_form(False)),
+        }
+        results = {name: {str(c): run_load(send, c, requests) for c in levels} for name, send in endpoints.items()}
+        results["workers"] = workers
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def flatten(results, prefix=""):
+    for key, value in results.items():
+        if isinstance(value, dict) and "median_ms" in value:
+            yield prefix + key, value["median_ms"]
+        elif isinstance(value, dict):
+            yield from flatten(value, prefix + key + "/")
+
+
+def compare(results, baseline, threshold):
+    # Regresja: mediana wolniejsza o więcej niż threshold (np. 0.2 = 20 %)
+    current = dict(flatten({k: results[k] for k in ("stages", "test_client", "gunicorn") if k in results}))
+    previous = dict(flatten({k: baseline[k] for k in ("stages", "test_client", "gunicorn") if k in baseline}))
+    report = []
+    for name in sorted(current.keys() & previous.keys()):
+        ratio = current[name] / previous[name] if previous[name] else float("inf")
+        report.append({"name": name, "baseline_ms": previous[name], "current_ms": current[name],
+                       "ratio": round(ratio, 3), "regression": ratio > 1 + threshold})
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="powtórzenia na etap")
+    parser.add_argument("--requests", type=int, default=200, help="żądania na poziom współbieżności")
+    parser.add_argument("--concurrency", default="1,4,16", help="poziomy współbieżności, np. 1,4,16")
+    parser.add_argument("--gunicorn", action="store_true", help="test obciążenia lokalnego gunicorna")
+    parser.add_argument("--workers", type=int, default=2, help="liczba workerów gunicorna")
+    parser.add_argument("--output", help="zapisz wyniki JSON do pliku")
+    parser.add_argument("--baseline", help="porównaj z zapisanym plikiem JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="dopuszczalne spowolnienie (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    with tempfile.TemporaryDirectory() as tmp:
+        install_pdf_stub(tmp)
+        os.environ["PDF_CACHE_DIR"] = os.path.join(tmp, "pdf_cache")
+        os.environ["PDF_JOBS_DIR"] = os.path.join(tmp, "pdf_jobs")
+        import numpy
+        import app as app_module
+
+        results = {
+            "meta": {
+                "app_version": app_module.APP_VERSION,
+                "python": platform.python_version(),
+                "numpy": numpy.__version__,
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "stages": bench_stages(app_module, args.repeat),
+            "test_client": bench_test_client(app_module, levels, args.requests),
+        }
+        if args.gunicorn:
+            results["gunicorn"] = bench_gunicorn(levels, args.requests, args.workers, tmp)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["comparison"] = compare(results, json.load(f), args.threshold)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    if any(row["regression"] for row in results.get("comparison", [])):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
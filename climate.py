@@ -0,0 +1,105 @@
+import calendar
+import math
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+# Amplitudy dobowe (zmiana w obrębie miesiąca) dla temperatury i wiatru
+A_DAY_TEMP = 1.0
+A_DAY_WIND = 0.5
+
+# Godzinowe tablice temperatury i wiatru oraz miesięczne amplitudy dobowe temperatury
+ReferenceYear = namedtuple("ReferenceYear", ["temp", "wind", "amplitude"])
+
+# sin(2π(h − 6)/24) dla godzin doby
+_HOUR_WAVE = np.array([math.sin(2 * math.pi * (hour - 6) / 24) for hour in range(24)])
+
+
+def round1(values):
+    # Zaokrąglenie do 0,1 zgodne z wbudowanym round(); np.round (×10, rint, ÷10)
+    # może się różnić tylko przy wartościach bliskich połówce – te liczymy round()
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, 1)
+    scaled = values * 10
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(v, 1) for v in values[near_tie].tolist()]
+    return rounded
+
+
+def _day_wave(year):
+    # sin(2π(dzień − połowa miesiąca)/liczba dni) dla kolejnych dni roku i indeks miesiąca dnia
+    waves, months = [], []
+    for m in range(1, 13):
+        num_days = calendar.monthrange(year, m)[1]
+        offset = num_days / 2.0
+        waves.extend(math.sin(2 * math.pi * (day - offset) / num_days) for day in range(1, num_days + 1))
+        months.extend([m - 1] * num_days)
+    return np.array(waves), np.array(months)
+
+
+def synthesize_reference_year(city_info, year):
+    day_wave, month_of_day = _day_wave(year)
+
+    def hourly(baseline, day_amplitude, hour_amplitude):
+        daily = np.asarray(baseline, dtype=float)[month_of_day] + day_amplitude * day_wave
+        values = daily[:, None] + np.asarray(hour_amplitude, dtype=float)[month_of_day][:, None] * _HOUR_WAVE
+        return round1(values.ravel())
+
+    temp = hourly(city_info["baseline"], A_DAY_TEMP, city_info["amplitude"])
+    wind = hourly(city_info.get("wind_baseline"), A_DAY_WIND, city_info.get("wind_amplitude"))
+    return ReferenceYear(temp, wind, list(city_info["amplitude"]))
+
+
+def blend_reference_years(refs, weights):
+    # Średnia ważona godzinowych tablic kilku stacji (bez słowników dziennych)
+    temp = np.round(sum(w * ref.temp for w, ref in zip(weights, refs)), 1)
+    wind = np.round(sum(w * ref.wind for w, ref in zip(weights, refs)), 1)
+    amplitude = np.round(np.asarray(weights) @ np.array([ref.amplitude for ref in refs]), 1)
+    return ReferenceYear(temp, wind, amplitude.tolist())
+
+
+class ReferenceYearCache:
+    # Rok referencyjny zależy tylko od miasta i roku, więc trzymamy gotowe
+    # dane w LRU o ograniczonym rozmiarze. Zwracane słowniki i tablice są
+    # współdzielone – nie wolno ich modyfikować. build(źródło, rok) tworzy
+    # brakujący wpis (domyślnie synteza z parametrów cities.txt).
+
+    def __init__(self, maxsize=64, build=synthesize_reference_year):
+        self.maxsize = maxsize
+        self.build = build
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, city, city_info, year):
+        key = (city, year)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = self.build(city_info, year)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def warm_up(self, cities, year, names=None):
+        # Najwyżej maxsize wpisów – dalsze tylko wypierałyby zbudowane przed chwilą
+        names = list(cities) if names is None else [name for name in names if name in cities]
+        for city in names[:self.maxsize]:
+            self.get(city, cities[city], year)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,168 @@
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+# Skompilowane wersje cities.txt i translations.txt: tablica rekordów miast
+# wczytywana jednym odczytem oraz osobne tabele tłumaczeń dla każdego języka,
+# ładowane przy pierwszym użyciu. Kompilacja jest automatyczna – plik jest
+# odświeżany, gdy zmieni się czas modyfikacji lub rozmiar źródła.
+
+# Plik: MAGIC, nagłówek (sygnatura źródła, liczba miast), rekordy CITY_DTYPE, potem
+# sklejone nazwy w UTF-8 – name_end to koniec nazwy miasta w tym bloku
+CITY_DTYPE = np.dtype([
+    ("name_end", "<i8"), ("lat", "<f8"), ("lon", "<f8"),
+    ("baseline", "<f8", 12), ("amplitude", "<f8", 12),
+    ("wind_baseline", "<f8", 12), ("wind_amplitude", "<f8", 12),
+])
+CITY_FIELDS = ("baseline", "amplitude", "wind_baseline", "wind_amplitude")
+MAGIC = b"ACCITY02"
+HEADER_DTYPE = np.dtype([("mtime", "<i8"), ("size", "<i8"), ("count", "<i8")])
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _require(path):
+    if not os.path.exists(path):
+        raise Exception(f"Plik {path} nie istnieje. Utwórz go zgodnie z instrukcjami.")
+
+
+def _write_atomic(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class CityTable(Mapping):
+    # Słownik miasto -> parametry nad spakowaną tablicą; słowniki z wartościami
+    # Pythona (jak z JSON) tworzymy dopiero przy pierwszym odwołaniu do miasta
+
+    def __init__(self, records, names):
+        self.records = records
+        self.names = names
+        self.lats = records["lat"]
+        self.lons = records["lon"]
+        self._positions = {name: i for i, name in enumerate(self.names)}
+        self._entries = {}
+
+    def __getitem__(self, name):
+        entry = self._entries.get(name)
+        if entry is None:
+            record = self.records[self._positions[name]]
+            entry = {"lat": float(record["lat"]), "lon": float(record["lon"])}
+            for field in CITY_FIELDS:
+                entry[field] = record[field].tolist()
+            self._entries[name] = entry
+        return entry
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _compile_cities(source):
+    with open(source, "r", encoding="utf-8") as f:
+        cities = json.load(f)
+    records = np.zeros(len(cities), dtype=CITY_DTYPE)
+    end = 0
+    for i, (name, info) in enumerate(cities.items()):
+        end += len(name.encode("utf-8"))
+        records[i]["name_end"] = end
+        records[i]["lat"] = info["lat"]
+        records[i]["lon"] = info["lon"]
+        for field in CITY_FIELDS:
+            records[i][field] = info[field]
+    return records, list(cities)
+
+
+def _decode_names(records, blob):
+    ends = records["name_end"].tolist()
+    return [blob[start:end].decode("utf-8") for start, end in zip([0] + ends[:-1], ends)]
+
+
+def load_cities(source, compiled_dir):
+    _require(source)
+    signature = source_signature(source)
+    target = os.path.join(compiled_dir, os.path.basename(source) + ".bin")
+    try:
+        with open(target, "rb") as f:
+            if f.read(len(MAGIC)) == MAGIC:
+                mtime, size, count = np.fromfile(f, HEADER_DTYPE, 1)[0].tolist()
+                if (mtime, size) == signature:
+                    records = np.fromfile(f, CITY_DTYPE, count)
+                    return CityTable(records, _decode_names(records, f.read()))
+    except (OSError, IndexError, ValueError):
+        pass
+    records, names = _compile_cities(source)
+
+    def write(f):
+        f.write(MAGIC)
+        np.array([signature + (len(records),)], dtype=HEADER_DTYPE).tofile(f)
+        records.tofile(f)
+        f.write("".join(names).encode("utf-8"))
+
+    try:
+        _write_atomic(target, write)
+    except OSError:
+        pass  # katalog tylko do odczytu – działamy na danych ze źródła
+    return CityTable(records, names)
+
+
+class Translations(Mapping):
+    # Język -> słownik tłumaczeń; tabela wczytywana przy pierwszym użyciu języka
+
+    def __init__(self, languages, load):
+        self.languages = languages
+        self._load = load
+        self._tables = {}
+
+    def __getitem__(self, language):
+        table = self._tables.get(language)
+        if table is None:
+            if language not in self.languages:
+                raise KeyError(language)
+            table = self._tables[language] = self._load(language)
+        return table
+
+    def __iter__(self):
+        return iter(self.languages)
+
+    def __len__(self):
+        return len(self.languages)
+
+
+def load_translations(source, compiled_dir):
+    _require(source)
+    signature = list(source_signature(source))
+    directory = os.path.join(compiled_dir, os.path.basename(source) + ".d")
+    index_path = os.path.join(directory, "index.json")
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        if index["signature"] != signature:
+            raise ValueError("stale")
+    except (OSError, ValueError, KeyError):
+        with open(source, "r", encoding="utf-8") as f:
+            translations = json.load(f)
+        index = {"signature": signature, "languages": list(translations)}
+        try:
+            for i, (language, table) in enumerate(translations.items()):
+                _write_atomic(os.path.join(directory, f"{i}.json"),
+                              lambda f, table=table: f.write(json.dumps(table, ensure_ascii=False).encode("utf-8")))
+            _write_atomic(index_path, lambda f: f.write(json.dumps(index).encode("utf-8")))
+        except OSError:
+            return Translations(index["languages"], translations.__getitem__)
+
+    def load(language):
+        with open(os.path.join(directory, f"{index['languages'].index(language)}.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    return Translations(index["languages"], load)
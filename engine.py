@@ -0,0 +1,181 @@
+import calendar
+import datetime
+from functools import lru_cache
+
+import numpy as np
+
+EMISSION_FACTOR = 0.233  # kg CO₂/kWh
+
+# Stałe fizyczne modelu drzwi
+AIR_DENSITY = 1.2        # kg/m³
+AIR_HEAT_CAPACITY = 1005  # J/(kg·K)
+GRAVITY = 9.81
+DISCHARGE_COEFFICIENT = 0.6
+
+# Sumy liczymy zawsze wzdłuż osi 0 tablicy C-ciągłej: numpy dodaje wtedy
+# wiersz po wierszu, tak jak sum() w Pythonie, więc zaokrąglone wyniki są
+# identyczne z dawną pętlą (redukcja po osi wewnętrznej sumuje parami).
+
+
+class YearIndex:
+    # Tablice indeksów dla roku: miesiąc/godzina każdej godziny roku,
+    # pozycja w macierzy (godzina miesiąca × miesiąc) i grupy tygodni ISO.
+
+    def __init__(self, year):
+        self.year = year
+        self.days_in_month = np.array([calendar.monthrange(year, m)[1] for m in range(1, 13)])
+        self.n_days = int(self.days_in_month.sum())
+        self.n_hours = self.n_days * 24
+        self.month_rows = int(self.days_in_month.max()) * 24
+
+        month_of_day = np.repeat(np.arange(12), self.days_in_month)
+        self.month_of_day = month_of_day
+        day_in_month = np.concatenate([np.arange(n) for n in self.days_in_month])
+        self.month_of_hour = np.repeat(month_of_day, 24)
+        self.hour_of_day = np.tile(np.arange(24), self.n_days)
+        self.slot_in_month = np.repeat(day_in_month, 24) * 24 + self.hour_of_day
+        self.hour_of_slot = np.arange(self.month_rows) % 24
+
+        first = datetime.date(year, 1, 1)
+        iso_weeks = [(first + datetime.timedelta(days=d)).isocalendar()[1] for d in range(self.n_days)]
+        self.weeks = sorted(set(iso_weeks))
+        col = {w: i for i, w in enumerate(self.weeks)}
+        self.week_col = np.array([col[w] for w in iso_weeks])
+        seen = [0] * len(self.weeks)
+        rows = []
+        for c in self.week_col:
+            rows.append(seen[c])
+            seen[c] += 1
+        self.week_row = np.array(rows)
+        self.week_len = np.array(seen)
+
+
+@lru_cache(maxsize=32)
+def year_index(year):
+    return YearIndex(year)
+
+
+def month_matrix(values, yi):
+    # (godzina miesiąca, miesiąc); brakujące dni wypełnione zerami
+    matrix = np.zeros((yi.month_rows, 12))
+    matrix[yi.slot_in_month, yi.month_of_hour] = values
+    return matrix
+
+
+def _round_list(values, ndigits=1):
+    return [round(v, ndigits) for v in values.tolist()]
+
+
+def monthly_averages(values, yi, open_hour, close_hour):
+    matrix = month_matrix(values, yi)
+    window = (open_hour <= yi.hour_of_slot) & (yi.hour_of_slot < close_hour)
+    full_sum = matrix.sum(axis=0)
+    op_sum = matrix[window].sum(axis=0)
+    full_count = yi.days_in_month * 24
+    op_count = yi.days_in_month * int(np.count_nonzero(window[:24]))
+    full_avg = _round_list(full_sum / full_count)
+    if op_count[0] == 0:
+        return full_avg, [None] * 12
+    return full_avg, _round_list(op_sum / op_count)
+
+
+def weekly_averages(values, yi):
+    daily = np.ascontiguousarray(values.reshape(yi.n_days, 24).T).sum(axis=0) / 24
+    grouped = np.zeros((int(yi.week_len.max()), len(yi.weeks)))
+    grouped[yi.week_row, yi.week_col] = daily
+    avg = grouped.sum(axis=0) / yi.week_len
+    return list(yi.weeks), _round_list(avg)
+
+
+def daily_amplitude(values, yi):
+    # Średnia połowa dobowej rozpiętości w każdym miesiącu (do tabeli klimatu)
+    days = values.reshape(yi.n_days, 24)
+    half_range = (days.max(axis=1) - days.min(axis=1)) / 2
+    return _round_list(np.bincount(yi.month_of_day, weights=half_range, minlength=12) / yi.days_in_month)
+
+
+def indoor_temperature(t_operating, indoor_temp_winter, indoor_temp_summer):
+    return np.where(t_operating < indoor_temp_winter, indoor_temp_winter,
+                    np.where(t_operating > indoor_temp_summer, indoor_temp_summer, t_operating))
+
+
+def door_load(operating_avgs, effective_hours, width, height, wind_multiplier,
+              indoor_temp_winter, indoor_temp_summer):
+    # Część modelu niezależna od kurtyny – liczona raz na drzwi, wspólna dla wielu modeli
+    t_operating = np.asarray(operating_avgs, dtype=float)
+    hours = np.asarray(effective_hours)
+    chosen_indoor = indoor_temperature(t_operating, indoor_temp_winter, indoor_temp_summer)
+    delta_t = np.abs(chosen_indoor - t_operating)
+    t_inside_k = chosen_indoor + 273.15
+    delta_p = AIR_DENSITY * GRAVITY * height * (delta_t / t_inside_k)
+    area = width * height
+    q_natural = DISCHARGE_COEFFICIENT * area * np.sqrt((2 * delta_p) / AIR_DENSITY)
+    q_corrected = q_natural * wind_multiplier
+    w_no = q_corrected * AIR_DENSITY * AIR_HEAT_CAPACITY * delta_t
+    return {
+        "delta_t": delta_t,
+        "q_corrected": q_corrected,
+        "hours": hours,
+        "without": (w_no / 1000) * hours,
+    }
+
+
+def curtain_energy(load, curtain_flow_m3s, motor_power):
+    q_corrected = load["q_corrected"]
+    hours = load["hours"]
+    e_no = load["without"]
+    positive = q_corrected > 0
+    eta = np.where(positive, np.minimum(curtain_flow_m3s / np.where(positive, q_corrected, 1.0), 1.0), 0.0)
+    q_effective = q_corrected * (1 - eta)
+    w_curtain = q_effective * AIR_DENSITY * AIR_HEAT_CAPACITY * load["delta_t"]
+    e_curtain = (w_curtain / 1000) * hours
+    return {
+        "without": e_no,
+        "with": e_curtain,
+        "savings": e_no - e_curtain,
+        "motor": hours * motor_power,
+    }
+
+
+def monthly_energy(operating_avgs, effective_hours, width, height, curtain_flow_m3s, motor_power,
+                   wind_multiplier, indoor_temp_winter, indoor_temp_summer):
+    # Wszystkie argumenty mogą być tablicami – wynik ma kształt (..., 12)
+    load = door_load(operating_avgs, effective_hours, width, height, wind_multiplier,
+                     indoor_temp_winter, indoor_temp_summer)
+    return curtain_energy(load, curtain_flow_m3s, motor_power)
+
+
+def annual_totals(energy, energy_cost, curtain_price):
+    # Zaokrąglenia jak w raporcie: najpierw miesiące do kWh, potem sumy i koszty
+    energy_without = np.rint(energy["without"]).astype(np.int64)
+    energy_with = np.rint(energy["with"]).astype(np.int64)
+    motor_energy = np.rint(energy["motor"]).astype(np.int64)
+    total_without = energy_without.sum(axis=-1)
+    total_with = energy_with.sum(axis=-1)
+    annual_motor = motor_energy.sum(axis=-1)
+    annual_with_motor = total_with + annual_motor
+    cost_without = np.rint(total_without * energy_cost).astype(np.int64)
+    cost_with = np.rint(total_with * energy_cost).astype(np.int64)
+    cost_motor = np.rint(annual_motor * energy_cost).astype(np.int64)
+    cost_with_motor = cost_with + cost_motor
+    savings_cost = cost_without - cost_with_motor
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback = np.where(savings_cost > 0, curtain_price / np.where(savings_cost > 0, savings_cost, 1), np.nan)
+    return {
+        "energy_without": energy_without,
+        "energy_with": energy_with,
+        "motor_energy": motor_energy,
+        "annual_energy_without": total_without,
+        "annual_energy_with": total_with,
+        "annual_motor_energy": annual_motor,
+        "annual_energy_with_motor": annual_with_motor,
+        "annual_cost_without": cost_without,
+        "annual_cost_with": cost_with,
+        "annual_cost_motor": cost_motor,
+        "annual_cost_with_motor": cost_with_motor,
+        "annual_savings_energy": total_without - annual_with_motor,
+        "annual_savings_cost": savings_cost,
+        "payback_period": payback,
+        "carbon_footprint": (total_without - annual_with_motor) * EMISSION_FACTOR,
+    }
+
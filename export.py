@@ -0,0 +1,135 @@
+import csv
+import datetime
+import io
+import json
+import struct
+
+import numpy as np
+
+from batch import BATCH_CHUNK, parse_door, door_operating_hours
+from engine import monthly_averages, monthly_energy
+
+EXPORT_CHUNK = 2000
+
+# Format kolumnowy: nagłówek pliku, potem bloki po BATCH_CHUNK wierszy.
+# Blok = długość (uint32 LE) + JSON {"rows", "columns": [{"name", "dtype", "bytes"}]}
+# + bufory kolumn po kolei; liczby little-endian, tekst jako przesunięcia int32
+# (rows + 1) i bajty UTF-8. Blok z rows = 0 kończy strumień.
+COLUMNAR_MAGIC = b"ACCOLS1\n"
+COLUMNAR_MIMETYPE = "application/vnd.aircurtain.columnar"
+
+HOURLY_FIELDS = ["timestamp", "temperature", "wind"]
+MONTHLY_FIELDS = ["month", "operating_temperature", "effective_hours", "energy_without", "energy_with",
+                  "motor_energy", "savings"]
+BATCH_COLUMNS = [
+    ("index", "<i8"),
+    ("id", "utf8"),
+    ("station", "utf8"),
+    ("error", "utf8"),
+    ("annual_energy_without", "<f8"),
+    ("annual_energy_with_motor", "<f8"),
+    ("annual_savings_energy", "<f8"),
+    ("annual_savings_cost", "<f8"),
+    ("payback_period", "<f8"),
+    ("carbon_footprint", "<f8"),
+]
+
+
+def hourly_rows(ref, year):
+    start = datetime.datetime(year, 1, 1)
+    step = datetime.timedelta(hours=1)
+    for hour, (temp, wind) in enumerate(zip(ref.temp.tolist(), ref.wind.tolist())):
+        yield {"timestamp": (start + hour * step).isoformat(), "temperature": temp, "wind": wind}
+
+
+def monthly_rows(config, ref, yi, wind_scale):
+    door = parse_door(config, wind_scale)
+    operating_avgs = monthly_averages(ref.temp, yi, door["open_hour"], door["close_hour"])[1]
+    if any(val is None for val in operating_avgs):
+        raise ValueError("No operating hours in the selected time window")
+    monthly_hours = door_operating_hours(door, yi.year, door["close_hour"] - door["open_hour"])
+    hours = [int(round(h * door["intensity"])) for h in monthly_hours]
+    energy = monthly_energy(operating_avgs, hours, door["width"], door["height"], door["curtain_flow_m3s"],
+                            door["motor_power"], door["wind_multiplier"],
+                            door["indoor_temp_winter"], door["indoor_temp_summer"])
+    columns = zip(operating_avgs, hours, *(np.rint(energy[key]).astype(int).tolist()
+                                          for key in ("without", "with", "motor", "savings")))
+    # Generator – silnik liczy cały rok naraz, ale wiersze wychodzą od razu po obliczeniu
+    return ({name: value for name, value in zip(MONTHLY_FIELDS, (month,) + row)}
+            for month, row in enumerate(columns, start=1))
+
+
+def csv_lines(fields, rows, rows_per_chunk=EXPORT_CHUNK):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _encode_column(values, dtype):
+    if dtype != "utf8":
+        return np.array(values, dtype=dtype).tobytes()
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i4")
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets.tobytes() + b"".join(encoded)
+
+
+def _columnar_block(rows):
+    buffers = []
+    header = {"rows": len(rows), "columns": []}
+    for name, dtype in BATCH_COLUMNS:
+        if dtype == "utf8":
+            values = ["" if row.get(name) is None else str(row[name]) for row in rows]
+        else:
+            values = [np.nan if row.get(name) is None else row[name] for row in rows]
+        data = _encode_column(values, dtype)
+        header["columns"].append({"name": name, "dtype": dtype, "bytes": len(data)})
+        buffers.append(data)
+    header = json.dumps(header).encode("utf-8")
+    return struct.pack("<I", len(header)) + header + b"".join(buffers)
+
+
+def columnar_blocks(rows, rows_per_block=BATCH_CHUNK):
+    # Wyniki run_batch -> bloki kolumnowe; podsumowanie floty jest pomijane
+    yield COLUMNAR_MAGIC
+    block = []
+    for row in rows:
+        if "fleet" in row:
+            continue
+        block.append(row)
+        if len(block) >= rows_per_block:
+            yield _columnar_block(block)
+            block = []
+    if block:
+        yield _columnar_block(block)
+    yield _columnar_block([])
+
+
+def read_columnar(stream):
+    # Odczyt formatu kolumnowego z pliku binarnego: generator słowników nazwa -> tablica
+    if stream.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("Not a columnar export")
+    while True:
+        (length,) = struct.unpack("<I", stream.read(4))
+        header = json.loads(stream.read(length))
+        if not header["rows"]:
+            return
+        block = {}
+        for column in header["columns"]:
+            data = stream.read(column["bytes"])
+            if column["dtype"] == "utf8":
+                rows = header["rows"]
+                offsets = np.frombuffer(data[:4 * (rows + 1)], dtype="<i4")
+                text = data[4 * (rows + 1):]
+                block[column["name"]] = [text[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(rows)]
+            else:
+                block[column["name"]] = np.frombuffer(data, dtype=column["dtype"])
+        yield block
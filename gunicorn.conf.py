@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+from metrics import clear_directory
+
+# Aplikacja (dane miast, tłumaczenia, indeks stacji) ładowana raz w procesie
+# głównym – workery współdzielą ją przez copy-on-write
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+# Metryki workerów trafiają do wspólnego katalogu, żeby /metrics pokazywał sumę
+# wszystkich procesów, a nie tylko workera, który odpowiedział
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "aircurtain_metrics"))
+
+
+def _warm_up():
+    # Rozgrzewamy cache lat referencyjnych dla wszystkich miast z cities.txt
+    if os.environ.get("REFYEAR_WARMUP", "1") == "1":
+        from app import warm_reference_cache
+        warm_reference_cache()
+
+
+def on_starting(server):
+    clear_directory(os.environ["METRICS_DIR"])
+
+
+def when_ready(server):
+    if preload_app:
+        _warm_up()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # Liczniki z rozgrzewania w procesie głównym odziedziczyłby każdy worker
+        from app import reference_cache
+        reference_cache.hits = reference_cache.misses = 0
+    else:
+        _warm_up()
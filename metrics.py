@@ -0,0 +1,247 @@
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, has_request_context, request
+
+# Granice kubełków histogramów w sekundach (jak domyślne w Prometheusie, gęściej poniżej 10 ms)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NoopStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.observe("aircurtain_stage_seconds", (("stage", self.name),), elapsed)
+        if has_request_context():
+            g.setdefault("server_timing", []).append((self.name, elapsed))
+        return False
+
+
+class Histogram:
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect_left(BUCKETS, value)
+        if index < len(BUCKETS):
+            self.buckets[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def clear_directory(directory):
+    # Przy starcie serwera usuwamy migawki workerów z poprzedniego uruchomienia
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class Metrics:
+    # Metryki procesu: histogramy czasów etapów i żądań oraz wartości
+    # odczytywane przy eksporcie (cache, kolejka PDF). Wyłączone – stage()
+    # zwraca pusty kontekst, a hooki Flaska nie są rejestrowane.
+    # Z directory każdy worker zapisuje tam migawkę swoich metryk (najwyżej
+    # co flush_interval s), a /metrics sumuje migawki wszystkich workerów:
+    # liczniki i histogramy także zakończonych procesów, gauge tylko żyjących.
+
+    def __init__(self, enabled=False, directory=None, flush_interval=1.0):
+        self.enabled = enabled
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._flusher_pid = None
+        self._snapshot_pid = None
+        self._snapshot_name = None
+        self._histograms = {}
+        self._help = {
+            "aircurtain_stage_seconds": "Duration of calculation pipeline stages",
+            "aircurtain_request_seconds": "HTTP request latency",
+        }
+        self._gauges = []
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NOOP
+        return _Stage(self, name)
+
+    def observe(self, metric, labels, seconds):
+        with self._lock:
+            histogram = self._histograms.get((metric, labels))
+            if histogram is None:
+                histogram = self._histograms[(metric, labels)] = Histogram()
+            histogram.observe(seconds)
+
+    def register(self, name, kind, help_text, collect):
+        # collect() -> lista (etykiety, wartość); kind: "counter" albo "gauge"
+        self._gauges.append((name, kind, help_text, collect))
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+
+        @app.before_request
+        def start_timer():
+            g.request_start = time.perf_counter()
+
+        @app.after_request
+        def record_request(response):
+            start = g.pop("request_start", None)
+            if start is None:
+                return response
+            elapsed = time.perf_counter() - start
+            labels = (("endpoint", request.endpoint or "unknown"), ("method", request.method),
+                      ("status", str(response.status_code)))
+            timings = g.get("server_timing", [])
+            timings.append(("total", elapsed))
+            response.headers["Server-Timing"] = ", ".join(f"{name};dur={seconds * 1000:.3f}"
+                                                          for name, seconds in timings)
+
+            def observe():
+                self.observe("aircurtain_request_seconds", labels, time.perf_counter() - start)
+                if self.directory:
+                    self._dirty = True
+                    self._start_flusher()
+
+            # Odpowiedź strumieniowa generuje treść dopiero po powrocie z widoku –
+            # czas mierzymy do zamknięcia strumienia, a nie do wysłania nagłówków
+            if response.is_streamed:
+                response.call_on_close(observe)
+            else:
+                observe()
+            return response
+
+        app.add_url_rule("/metrics", "metrics", lambda: Response(self.render(), mimetype="text/plain; version=0.0.4"))
+
+    def _local_snapshot(self):
+        with self._lock:
+            histograms = [[metric, [list(label) for label in labels], list(h.buckets), h.count, h.sum]
+                          for (metric, labels), h in self._histograms.items()]
+        values = [[name, kind, [[[list(label) for label in labels], value] for labels, value in collect()]]
+                  for name, kind, help_text, collect in self._gauges]
+        return {"pid": os.getpid(), "histograms": histograms, "values": values}
+
+    def flush(self):
+        # Migawka procesu w pliku <pid>-<start>.json (zapis atomowy); nazwa zmienia się po fork()
+        if self._snapshot_pid != os.getpid():
+            self._snapshot_pid = os.getpid()
+            self._snapshot_name = f"{self._snapshot_pid}-{time.time_ns()}.json"
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._local_snapshot(), f)
+        os.replace(tmp_path, os.path.join(self.directory, self._snapshot_name))
+
+    def _start_flusher(self):
+        # Wątek zapisujący migawkę po zmianach – osobny w każdym procesie (wątki nie przeżywają fork())
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                if self._dirty:
+                    self._dirty = False
+                    self.flush()
+
+        threading.Thread(target=run, name="metrics-flush", daemon=True).start()
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self._local_snapshot()]
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self):
+        histograms = {}
+        values = {}
+        for snapshot in self._snapshots():
+            alive = snapshot["pid"] == os.getpid() or _pid_alive(snapshot["pid"])
+            for metric, labels, buckets, count, total in snapshot["histograms"]:
+                key = (metric, tuple(tuple(label) for label in labels))
+                merged = histograms.setdefault(key, [[0] * len(BUCKETS), 0, 0.0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += count
+                merged[2] += total
+            for name, kind, samples in snapshot["values"]:
+                if kind == "gauge" and not alive:
+                    continue
+                for labels, value in samples:
+                    key = (name, tuple(tuple(label) for label in labels))
+                    values[key] = values.get(key, 0) + value
+
+        lines = []
+        seen = set()
+        for (metric, labels), (buckets, count, total) in sorted(histograms.items()):
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# HELP {metric} {self._help.get(metric, metric)}")
+                lines.append(f"# TYPE {metric} histogram")
+            label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f'{metric}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum{{{label_text}}} {total}")
+            lines.append(f"{metric}_count{{{label_text}}} {count}")
+        for name, kind, help_text, collect in self._gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in values.items():
+                if metric != name:
+                    continue
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,76 @@
+import calendar
+import datetime
+from functools import lru_cache
+
+import numpy as np
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# Tablice liczby dni tygodnia w miesiącach liczymy raz na rok (i listę świąt);
+# godziny pracy dla harmonogramu to iloczyn macierzy 12×7 i wektora 7 dni.
+
+
+def days_mask(days):
+    # Nazwy dni lub numery 0–6 (poniedziałek = 0) -> maska bitowa
+    mask = 0
+    for day in days:
+        if day in WEEKDAYS:
+            day = WEEKDAYS.index(day)
+        elif not (isinstance(day, int) and 0 <= day < 7):
+            raise ValueError(f"Unknown weekday: {day}")
+        mask |= 1 << day
+    return mask
+
+
+def _parse_holidays(year, holidays):
+    dates = set()
+    for holiday in holidays:
+        if isinstance(holiday, str):
+            holiday = datetime.date.fromisoformat(holiday)
+        if holiday.year == year:
+            dates.add(holiday)
+    return tuple(sorted(dates))
+
+
+@lru_cache(maxsize=None)
+def _weekday_counts(year, holidays):
+    counts = np.zeros((12, 7), dtype=np.int64)
+    for m in range(1, 13):
+        first_weekday, num_days = calendar.monthrange(year, m)
+        full_weeks, rest = divmod(num_days, 7)
+        counts[m-1] += full_weeks
+        for i in range(rest):
+            counts[m-1, (first_weekday + i) % 7] += 1
+    for holiday in holidays:
+        counts[holiday.month-1, holiday.weekday()] -= 1
+    counts.setflags(write=False)
+    return counts
+
+
+def weekday_counts(year, holidays=()):
+    # Macierz 12×7: ile poniedziałków, wtorków, ... w każdym miesiącu (bez świąt)
+    return _weekday_counts(year, _parse_holidays(year, holidays))
+
+
+@lru_cache(maxsize=4096)
+def _operating_hours(year, mask, duration, holidays):
+    days = _weekday_counts(year, holidays) @ np.array([(mask >> i) & 1 for i in range(7)])
+    return tuple((days * duration).tolist())
+
+
+def operating_hours(year, mask, duration, holidays=()):
+    # Godziny pracy w miesiącach dla stałego dnia pracy i maski dni tygodnia
+    return _operating_hours(year, mask, duration, _parse_holidays(year, holidays))
+
+
+@lru_cache(maxsize=4096)
+def _weekday_operating_hours(year, weekday_hours, holidays):
+    return tuple((_weekday_counts(year, holidays) @ np.array(weekday_hours, dtype=float)).tolist())
+
+
+def weekday_operating_hours(year, weekday_hours, holidays=()):
+    # Różne godziny otwarcia w dni tygodnia: weekday_hours to 7 liczb godzin (0 = zamknięte)
+    if len(weekday_hours) != 7:
+        raise ValueError("weekday_hours needs 7 values, Monday to Sunday")
+    return _weekday_operating_hours(year, tuple(float(h) for h in weekday_hours),
+                                    _parse_holidays(year, holidays))
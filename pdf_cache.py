@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+
+def cache_key(form, version, template_mtime):
+    # Klucz ze znormalizowanych danych formularza, wersji aplikacji i szablonu
+    normalized = {key.strip(): [value.strip() for value in values] for key, values in form.items()}
+    payload = json.dumps([normalized, version, template_mtime], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    # Gotowe PDF-y na dysku, nazwane kluczem. Czas modyfikacji pliku służy
+    # jako znacznik ostatniego użycia – przy przekroczeniu limitu bajtów
+    # usuwamy najdawniej używane.
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pdf")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict()
+        return path
+
+    def put_file(self, key, source):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".pdf"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+                total -= size
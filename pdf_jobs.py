@@ -0,0 +1,151 @@
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pdfkit
+
+# Stan zadań trzymamy w plikach, żeby każdy worker gunicorna mógł odpowiedzieć
+# na zapytanie o status i pobranie, niezależnie od tego, kto przyjął zadanie.
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _write_status(directory, job_id, **status):
+    path = os.path.join(directory, job_id + ".json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+
+
+def _render_job(directory, job_id, html, timeout, submitted):
+    # Uruchamiane w procesie z puli: wkhtmltopdf z limitem czasu
+    _write_status(directory, job_id, status="running", progress=50, submitted=submitted, started=time.time())
+    pdf_path = os.path.join(directory, job_id + ".pdf")
+    tmp_path = pdf_path + ".tmp"
+    try:
+        args = pdfkit.PDFKit(html, "string").command(tmp_path)
+        proc = subprocess.run(args, input=html.encode("utf-8"), capture_output=True, timeout=timeout)
+        if proc.returncode != 0 or not os.path.exists(tmp_path):
+            raise IOError(proc.stderr.decode("utf-8", errors="replace")[-500:] or "wkhtmltopdf failed")
+        os.replace(tmp_path, pdf_path)
+    except subprocess.TimeoutExpired:
+        _write_status(directory, job_id, status="failed", progress=100, submitted=submitted,
+                      error=f"PDF rendering exceeded {timeout} s")
+        return
+    except Exception as e:
+        _write_status(directory, job_id, status="failed", progress=100, submitted=submitted, error=str(e))
+        return
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _write_status(directory, job_id, status="done", progress=100, submitted=submitted, finished=time.time())
+
+
+class PdfJobQueue:
+
+    def __init__(self, directory, workers=2, queue_limit=16, timeout=60, ttl=600):
+        self.directory = directory
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self.ttl = ttl
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _pool(self):
+        # Pulę tworzymy przy pierwszym zadaniu (już po forku gunicorna)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, html, on_done=None):
+        # on_done(ścieżka PDF) wywoływane w tym procesie po udanym renderowaniu
+        self.cleanup()
+        with self._lock:
+            if len(self._pending) >= self.queue_limit:
+                raise QueueFull(f"PDF queue is full ({self.queue_limit} jobs)")
+            job_id = uuid.uuid4().hex
+            submitted = time.time()
+            _write_status(self.directory, job_id, status="queued", progress=0, submitted=submitted)
+            try:
+                future = self._pool().submit(_render_job, self.directory, job_id, html, self.timeout, submitted)
+            except BrokenProcessPool as e:
+                # Pula padła między zadaniami – następne zgłoszenie utworzy nową
+                self._executor = None
+                _write_status(self.directory, job_id, status="failed", progress=100, submitted=submitted,
+                              error=str(e) or "PDF worker pool is broken")
+                return job_id
+            self._pending.add(future)
+        future.add_done_callback(lambda f: self._finished(f, job_id, submitted, on_done))
+        return job_id
+
+    def submit_finished(self, pdf_path):
+        # Zadanie od razu gotowe – np. PDF z cache
+        job_id = uuid.uuid4().hex
+        submitted = time.time()
+        shutil.copyfile(pdf_path, os.path.join(self.directory, job_id + ".pdf"))
+        _write_status(self.directory, job_id, status="done", progress=100, submitted=submitted, finished=submitted)
+        return job_id
+
+    def _finished(self, future, job_id, submitted, on_done):
+        with self._lock:
+            self._pending.discard(future)
+        if future.exception() is None:
+            pdf_path = os.path.join(self.directory, job_id + ".pdf")
+            if on_done is not None and os.path.exists(pdf_path):
+                on_done(pdf_path)
+        else:
+            # Proces puli zginął, zanim zapisał wynik
+            _write_status(self.directory, job_id, status="failed", progress=100, submitted=submitted,
+                          error=str(future.exception()))
+            if self._executor is not None and getattr(self._executor, "_broken", False):
+                self._executor = None
+
+    def _valid(self, job_id):
+        return len(job_id) == 32 and all(c in "0123456789abcdef" for c in job_id)
+
+    def status(self, job_id):
+        if not self._valid(job_id):
+            return None
+        self.cleanup()
+        try:
+            with open(os.path.join(self.directory, job_id + ".json"), encoding="utf-8") as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return None
+        status["elapsed"] = round(time.time() - status["submitted"], 1)
+        return status
+
+    def result_path(self, job_id):
+        status = self.status(job_id)
+        if status is None or status["status"] != "done":
+            return None
+        return os.path.join(self.directory, job_id + ".pdf")
+
+    def cleanup(self):
+        # Usuwamy wyniki i statusy starsze niż ttl
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,137 @@
+import calendar
+import itertools
+
+import numpy as np
+
+from batch import parse_door, parse_integer, parse_number, door_operating_hours
+from engine import EMISSION_FACTOR, year_index, monthly_averages, monthly_energy, annual_totals
+
+DEFAULT_HORIZON = 15
+MAX_HORIZON = 25
+DEFAULT_ENERGY_ESCALATION = 0.03
+DEFAULT_EMISSION_DECLINE = 0.03
+DEFAULT_DISCOUNT_RATE = 0.05
+MIN_START_YEAR = 1900
+MAX_START_YEAR = 2200
+MAX_WARMING_RATE = 0.5
+MAX_ENERGY_ESCALATION = 1.0
+
+# Scenariusze ocieplenia: przyrost temperatury w °C na rok względem roku startowego
+WARMING_SCENARIOS = {
+    "none": 0.0,
+    "low": 0.015,
+    "medium": 0.03,
+    "high": 0.05,
+}
+
+
+def reference_calendar_year(year, base_year):
+    # Rok referencyjny zależy tylko od długości miesięcy, więc lata zwykłe dzielą
+    # wpis cache z base_year, a przestępne z pierwszym rokiem przestępnym po nim
+    if calendar.isleap(year) == calendar.isleap(base_year):
+        return base_year
+    return next(y for y in itertools.count(base_year + 1) if calendar.isleap(y) == calendar.isleap(year))
+
+
+def warming_rate(value):
+    if isinstance(value, str):
+        if value not in WARMING_SCENARIOS:
+            raise ValueError(f"Unknown warming scenario: {value}")
+        return WARMING_SCENARIOS[value]
+    rate = parse_number(value, "warming")
+    if abs(rate) > MAX_WARMING_RATE:
+        raise ValueError(f"warming must be between -{MAX_WARMING_RATE} and {MAX_WARMING_RATE} °C per year")
+    return rate
+
+
+def payback_year(cumulative, investment):
+    # Ułamek roku, w którym skumulowane oszczędności pokrywają inwestycję (interpolacja liniowa)
+    reached = np.flatnonzero(cumulative >= investment)
+    if not len(reached):
+        return None
+    t = reached[0]
+    previous = cumulative[t - 1] if t else 0.0
+    return round(t + (investment - previous) / (cumulative[t] - previous), 2)
+
+
+def run_projection(config, locate, base_year, wind_scale):
+    # locate(rok) -> rok referencyjny stacji dla kalendarza tego roku
+    door = parse_door(config, wind_scale)
+    options = config.get("projection") or {}
+    horizon = parse_integer(options.get("horizon", DEFAULT_HORIZON), "horizon")
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_HORIZON} years")
+    start_year = parse_integer(options.get("startYear", base_year), "startYear")
+    if not MIN_START_YEAR <= start_year <= MAX_START_YEAR:
+        raise ValueError(f"startYear must be between {MIN_START_YEAR} and {MAX_START_YEAR}")
+    rate = warming_rate(options.get("warming", "medium"))
+    escalation = parse_number(options.get("energyEscalation", DEFAULT_ENERGY_ESCALATION), "energyEscalation")
+    if not -1 < escalation <= MAX_ENERGY_ESCALATION:
+        raise ValueError(f"energyEscalation must be greater than -1 and at most {MAX_ENERGY_ESCALATION}")
+    decline = parse_number(options.get("emissionDecline", DEFAULT_EMISSION_DECLINE), "emissionDecline")
+    if not 0 <= decline < 1:
+        raise ValueError("emissionDecline must be at least 0 and less than 1")
+    discount_rate = parse_number(options.get("discountRate", DEFAULT_DISCOUNT_RATE), "discountRate")
+    if discount_rate <= -1:
+        raise ValueError("discountRate must be greater than -1")
+
+    years = list(range(start_year, start_year + horizon))
+    t = np.arange(horizon)
+    duration = door["close_hour"] - door["open_hour"]
+    # Średnie w godzinach pracy liczymy raz na wariant kalendarza (zwykły/przestępny)
+    averages = {}
+    for year in years:
+        ref_year = reference_calendar_year(year, base_year)
+        if ref_year not in averages:
+            avgs = monthly_averages(locate(ref_year).temp, year_index(ref_year), door["open_hour"], door["close_hour"])[1]
+            if any(val is None for val in avgs):
+                raise ValueError("No operating hours in the selected time window")
+            averages[ref_year] = avgs
+    offsets = rate * t
+    temps = np.array([averages[reference_calendar_year(year, base_year)] for year in years]) + offsets[:, None]
+    hours = np.array([[int(round(h * door["intensity"])) for h in door_operating_hours(door, year, duration)]
+                      for year in years])
+    energy_prices = np.round(door["energy_cost"] * (1 + escalation) ** t, 4)
+    emission_factors = EMISSION_FACTOR * (1 - decline) ** t
+
+    energy = monthly_energy(temps, hours, door["width"], door["height"], door["curtain_flow_m3s"],
+                            door["motor_power"], door["wind_multiplier"],
+                            door["indoor_temp_winter"], door["indoor_temp_summer"])
+    totals = annual_totals(energy, energy_prices, door["curtain_price"])
+    savings_cost = totals["annual_savings_cost"].astype(float)
+    savings_energy = totals["annual_savings_energy"]
+    # Przepływy na koniec każdego roku, dyskontowane do roku startowego
+    with np.errstate(over="ignore", under="ignore"):
+        discount_factors = (1 + discount_rate) ** (t + 1)
+    if not (np.isfinite(discount_factors) & (discount_factors > 0)).all():
+        raise ValueError("discountRate is out of range for this horizon")
+    discounted = savings_cost / discount_factors
+    cumulative = np.cumsum(savings_cost)
+    cumulative_discounted = np.cumsum(discounted)
+    carbon = savings_energy * emission_factors
+    cumulative_carbon = np.cumsum(carbon)
+
+    rows = [{
+        "year": year,
+        "temperature_offset": round(float(offsets[i]), 2),
+        "energy_cost": float(energy_prices[i]),
+        "emission_factor": round(float(emission_factors[i]), 4),
+        "operating_hours": int(hours[i].sum()),
+        "annual_savings_energy": int(savings_energy[i]),
+        "annual_savings_cost": int(savings_cost[i]),
+        "discounted_savings": round(float(discounted[i]), 2),
+        "cashflow": round(float(savings_cost[i] - (door["curtain_price"] if i == 0 else 0)), 2),
+        "cumulative_cashflow": round(float(cumulative[i] - door["curtain_price"]), 2),
+        "cumulative_discounted_cashflow": round(float(cumulative_discounted[i] - door["curtain_price"]), 2),
+        "carbon_footprint": round(float(carbon[i]), 1),
+        "cumulative_carbon_footprint": round(float(cumulative_carbon[i]), 1),
+    } for i, year in enumerate(years)]
+    return {
+        "years": rows,
+        "curtain_price": door["curtain_price"],
+        "warming_rate": rate,
+        "payback_period": payback_year(cumulative, door["curtain_price"]),
+        "discounted_payback_period": payback_year(cumulative_discounted, door["curtain_price"]),
+        "npv": round(float(cumulative_discounted[-1] - door["curtain_price"]), 2),
+        "cumulative_carbon_footprint": round(float(cumulative_carbon[-1]), 1),
+    }
@@ -0,0 +1,142 @@
+import numpy as np
+
+from batch import DoorProfiles, parse_door, parse_integer, parse_number
+from engine import door_load, curtain_energy, annual_totals
+
+DEFAULT_HORIZON = 10
+DEFAULT_DISCOUNT_RATE = 0.05
+DEFAULT_TOP = 10
+MAX_HORIZON = 50
+
+
+def parse_catalogue(models):
+    # Katalog kurtyn -> tablice kolumnowe (przepływ w m³/h jak w formularzu)
+    if not isinstance(models, list) or not models:
+        raise ValueError("Catalogue must be a non-empty list of models")
+
+    def column(name, default=None):
+        return np.array([parse_number(m[name], name) if default is None or name in m else default for m in models])
+
+    return {
+        "model": [str(m.get("model", m.get("id", position))) for position, m in enumerate(models)],
+        "curtain_flow_m3s": column("curtainFlow") / 3600.0,
+        "motor_power": column("motorPower", 0.3),
+        "curtain_price": column("curtainPrice"),
+        "max_width": column("maxWidth", np.inf),
+        "max_height": column("maxHeight", np.inf),
+    }
+
+
+def annuity_factor(horizon, discount_rate):
+    if discount_rate == 0:
+        return float(horizon)
+    return (1 - (1 + discount_rate) ** -horizon) / discount_rate
+
+
+def parse_options(payload):
+    # Horyzont, stopa i liczba pozycji w rankingu -> (współczynnik annuitetowy, top);
+    # sprawdzane przed rozpoczęciem strumienia, żeby błąd dał 400, a nie urwaną odpowiedź
+    horizon = parse_integer(payload.get("horizon", DEFAULT_HORIZON), "horizon")
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {MAX_HORIZON} years")
+    discount_rate = parse_number(payload.get("discountRate", DEFAULT_DISCOUNT_RATE), "discountRate")
+    if discount_rate <= -1:
+        raise ValueError("discountRate must be greater than -1")
+    top = parse_integer(payload.get("top", DEFAULT_TOP), "top")
+    if top < 1:
+        raise ValueError("top must be at least 1")
+    try:
+        annuity = annuity_factor(horizon, discount_rate)
+    except OverflowError:
+        raise ValueError("discountRate is too close to -1 for this horizon")
+    return annuity, top
+
+
+def _dominates(payback, npv, co2, candidates, others):
+    # Macierz [kandydat, inny]: czy "inny" dominuje kandydata
+    pb_le = payback[others][None, :] <= payback[candidates][:, None]
+    npv_ge = npv[others][None, :] >= npv[candidates][:, None]
+    co2_ge = co2[others][None, :] >= co2[candidates][:, None]
+    strict = ((payback[others][None, :] < payback[candidates][:, None])
+              | (npv[others][None, :] > npv[candidates][:, None])
+              | (co2[others][None, :] > co2[candidates][:, None]))
+    return (pb_le & npv_ge & co2_ge & strict).any(axis=1)
+
+
+def pareto_front(payback, npv, co2):
+    # Minimalizujemy czas zwrotu, maksymalizujemy NPV i redukcję CO₂
+    order = np.lexsort((-co2, -npv, payback))
+    npv_sorted = npv[order]
+    co2_sorted = co2[order]
+    # Punkt z najlepszym NPV albo CO₂ spośród wszystkich o krótszym zwrocie na pewno należy do frontu
+    prev_npv = np.concatenate(([-np.inf], np.maximum.accumulate(npv_sorted)[:-1]))
+    prev_co2 = np.concatenate(([-np.inf], np.maximum.accumulate(co2_sorted)[:-1]))
+    certain = (npv_sorted > prev_npv) | (co2_sorted > prev_co2)
+    front = order[certain]
+    rest = order[~certain]
+    if len(rest):
+        # Pozostałe najpierw sprawdzamy względem pewnego frontu, niejasne – względem wszystkich
+        rest = rest[~_dominates(payback, npv, co2, rest, front)]
+    if len(rest):
+        rest = rest[~_dominates(payback, npv, co2, rest, np.arange(len(payback)))]
+    return np.sort(np.concatenate((front, rest)))
+
+
+def _model_row(catalogue, index, totals, npv, row):
+    savings_cost = int(totals["annual_savings_cost"][row])
+    return {
+        "model": catalogue["model"][index],
+        "curtain_price": float(catalogue["curtain_price"][index]),
+        "annual_savings_energy": int(totals["annual_savings_energy"][row]),
+        "annual_savings_cost": savings_cost,
+        "payback_period": round(float(totals["payback_period"][row]), 2) if savings_cost > 0 else None,
+        "npv": round(float(npv[row]), 2),
+        "carbon_footprint": round(float(totals["carbon_footprint"][row]), 1),
+    }
+
+
+def size_door(door, operating_avgs, hours, catalogue, annuity, top):
+    fits = np.flatnonzero((catalogue["max_width"] >= door["width"])
+                          & (catalogue["max_height"] >= door["height"]))
+    if not len(fits):
+        return {"models": 0, "ranking": {}, "pareto": []}
+    load = door_load(operating_avgs, hours, door["width"], door["height"], door["wind_multiplier"],
+                     door["indoor_temp_winter"], door["indoor_temp_summer"])
+    energy = curtain_energy(load, catalogue["curtain_flow_m3s"][fits][:, None],
+                            catalogue["motor_power"][fits][:, None])
+    price = catalogue["curtain_price"][fits]
+    totals = annual_totals(energy, door["energy_cost"], price)
+    npv = totals["annual_savings_cost"] * annuity - price
+    payback = np.where(np.isnan(totals["payback_period"]), np.inf, totals["payback_period"])
+    co2 = totals["carbon_footprint"].astype(float)
+
+    def rows(selected):
+        return [_model_row(catalogue, fits[row], totals, npv, row) for row in selected]
+
+    return {
+        "models": len(fits),
+        "ranking": {
+            "payback": rows(np.argsort(payback, kind="stable")[:top]),
+            "npv": rows(np.argsort(-npv, kind="stable")[:top]),
+            "carbon_footprint": rows(np.argsort(-co2, kind="stable")[:top]),
+        },
+        "pareto": rows(pareto_front(payback, npv, co2)),
+    }
+
+
+def run_sizing(doors, catalogue, locate, yi, wind_scale, annuity, top=DEFAULT_TOP):
+    # Generator: dla każdych drzwi ranking modeli z katalogu i front Pareto
+    profiles = DoorProfiles(locate, yi)
+    for position, raw in enumerate(doors):
+        try:
+            # Przepływ i cena pochodzą z katalogu – w drzwiach są opcjonalne
+            door = parse_door(dict({"curtainFlow": 0}, **raw), wind_scale)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            yield {"index": position, "error": f"Invalid door configuration: {e}"}
+            continue
+        station, operating_avgs, hours = profiles.lookup(door)
+        if operating_avgs is None:
+            yield {"index": position, "error": "No operating hours in the selected time window"}
+            continue
+        result = size_door(door, operating_avgs, hours, catalogue, annuity, top)
+        yield dict({"index": position, "id": raw.get("id"), "station": station}, **result)
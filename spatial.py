@@ -0,0 +1,99 @@
+import heapq
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+LEAF_SIZE = 16
+
+
+def unit_vectors(lats, lons):
+    phi = np.radians(np.asarray(lats, dtype=float))
+    lam = np.radians(np.asarray(lons, dtype=float))
+    return np.column_stack((np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class StationIndex:
+    # Drzewo k-d na punktach sfery jednostkowej. Odległość cięciwy rośnie
+    # razem z odległością po okręgu wielkim, więc najbliższe stacje są te same
+    # co przy haversine, a zapytanie odwiedza tylko kilka liści.
+
+    def __init__(self, names, lats, lons, leaf_size=LEAF_SIZE):
+        self.names = list(names)
+        points = unit_vectors(lats, lons)
+        self._order = np.arange(len(self.names))
+        self._split_dim = []
+        self._split_val = []
+        self._children = []
+        self._ranges = []
+        if len(self.names):
+            self._build(points, 0, len(self.names), leaf_size)
+        self._points = points[self._order]
+
+    def __len__(self):
+        return len(self.names)
+
+    def _build(self, points, start, end, leaf_size):
+        node = len(self._split_dim)
+        self._split_dim.append(-1)
+        self._split_val.append(0.0)
+        self._children.append((-1, -1))
+        self._ranges.append((start, end))
+        if end - start <= leaf_size:
+            return node
+        idx = self._order[start:end]
+        spread = points[idx].max(axis=0) - points[idx].min(axis=0)
+        dim = int(np.argmax(spread))
+        mid = (end - start) // 2
+        part = np.argpartition(points[idx, dim], mid)
+        self._order[start:end] = idx[part]
+        self._split_dim[node] = dim
+        self._split_val[node] = float(points[self._order[start + mid], dim])
+        left = self._build(points, start, start + mid, leaf_size)
+        right = self._build(points, start + mid, end, leaf_size)
+        self._children[node] = (left, right)
+        return node
+
+    def query(self, lat, lon, k=1):
+        # Lista (nazwa, odległość w km) dla k najbliższych stacji, od najbliższej
+        if not self.names:
+            return []
+        k = min(k, len(self.names))
+        target = unit_vectors([lat], [lon])[0]
+        best = []  # kopiec (-d², -pozycja): na szczycie najdalszy z kandydatów
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if len(best) == k and bound > -best[0][0]:
+                continue
+            dim = self._split_dim[node]
+            if dim < 0:
+                start, end = self._ranges[node]
+                d2 = ((self._points[start:end] - target) ** 2).sum(axis=1)
+                for offset, dist in enumerate(d2.tolist()):
+                    item = (-dist, -(start + offset))
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+                continue
+            diff = target[dim] - self._split_val[node]
+            left, right = self._children[node]
+            near, far = (left, right) if diff < 0 else (right, left)
+            stack.append((far, diff * diff))
+            stack.append((near, bound))
+        best.sort(reverse=True)
+        return [(self.names[self._order[-pos]], chord_to_km(math.sqrt(-neg_d2))) for neg_d2, pos in best]
+
+
+def idw_weights(distances, power=2):
+    # Wagi odwrotnej odległości; stacja w tym samym punkcie dostaje całą wagę
+    distances = np.asarray(distances, dtype=float)
+    if (distances <= 1e-9).any():
+        return (distances <= 1e-9) / np.count_nonzero(distances <= 1e-9)
+    weights = 1.0 / distances ** power
+    return weights / weights.sum()
@@ -0,0 +1,195 @@
+"""Binarny magazyn godzinowych lat meteorologicznych (TMY) dla wielu stacji.
+
+Kompilacja plików EPW/CSV (offline):
+    python station_store.py compile --output data/stations pliki/*.epw pliki/*.csv
+
+Powstają dwa pliki: <output>.bin (dla każdej stacji blok float32: 8760 godzin
+temperatury, potem 8760 godzin wiatru) oraz <output>.idx (lat, lon, koniec nazwy
+w bloku nazw UTF-8 – nazwy mają dowolną długość).
+Aplikacja mapuje .bin do pamięci (STATION_STORE=<output>), więc workery
+gunicorna współdzielą strony, a odczyt stacji nie wymaga parsowania.
+"""
+import argparse
+import calendar
+import csv
+import os
+import sys
+
+import numpy as np
+
+from climate import ReferenceYear
+from engine import daily_amplitude, year_index
+from spatial import StationIndex
+
+HOURS = 8760
+BLOCK = 2 * HOURS  # temperatura + wiatr
+# .idx: MAGIC, liczba stacji (uint64), rekordy INDEX_DTYPE, potem sklejone nazwy w UTF-8
+INDEX_DTYPE = np.dtype([("lat", "<f8"), ("lon", "<f8"), ("name_end", "<i8")])
+MAGIC = b"ACSTORE2"
+MAX_GAP_FRACTION = 0.1
+
+# Kolumny EPW (EnergyPlus): 1 miesiąc, 2 dzień, 6 temperatura, 21 prędkość wiatru
+EPW_MONTH, EPW_DAY, EPW_TEMP, EPW_WIND = 1, 2, 6, 21
+EPW_MISSING_TEMP = 99.9
+EPW_MISSING_WIND = 999.0
+
+CSV_TEMP_COLUMNS = ("temperature", "temp", "temp_air", "dry_bulb")
+CSV_WIND_COLUMNS = ("wind", "wind_speed", "windspeed")
+
+
+def _fill_gaps(values):
+    missing = np.isnan(values)
+    if missing.mean() > MAX_GAP_FRACTION:
+        raise ValueError(f"{missing.mean():.0%} of hours are missing")
+    if missing.any():
+        hours = np.arange(len(values))
+        values[missing] = np.interp(hours[missing], hours[~missing], values[~missing])
+    return values
+
+
+def _drop_leap_day(months, days, *series):
+    keep = ~((months == 2) & (days == 29))
+    return [s[keep] for s in series]
+
+
+def read_epw(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        location = next(csv.reader([f.readline()]))
+        rows = [row for row in csv.reader(f) if row and row[0][:1].isdigit()]
+    name, lat, lon = location[1], float(location[6]), float(location[7])
+    if location[5] and location[5] != "-":
+        name = f"{name} ({location[5]})"
+    months = np.array([int(row[EPW_MONTH]) for row in rows])
+    days = np.array([int(row[EPW_DAY]) for row in rows])
+    temp = np.array([float(row[EPW_TEMP]) for row in rows])
+    wind = np.array([float(row[EPW_WIND]) for row in rows])
+    temp[temp >= EPW_MISSING_TEMP] = np.nan
+    wind[wind >= EPW_MISSING_WIND] = np.nan
+    temp, wind = _drop_leap_day(months, days, temp, wind)
+    return name, lat, lon, temp, wind
+
+
+def read_csv(path):
+    # Nagłówek z kolumnami temperatury i wiatru; opcjonalnie station/lat/lon
+    # (pierwszy wiersz) oraz month/day, żeby pominąć 29 lutego
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+        rows = list(reader)
+    temp_column = next((fields[c] for c in CSV_TEMP_COLUMNS if c in fields), None)
+    wind_column = next((fields[c] for c in CSV_WIND_COLUMNS if c in fields), None)
+    if temp_column is None or wind_column is None or "lat" not in fields or "lon" not in fields:
+        raise ValueError("expected lat, lon, temperature and wind columns")
+
+    def number(value):
+        return float(value) if value not in ("", None) else np.nan
+
+    name = rows[0].get(fields.get("station", ""), "") or os.path.splitext(os.path.basename(path))[0]
+    temp = np.array([number(row[temp_column]) for row in rows])
+    wind = np.array([number(row[wind_column]) for row in rows])
+    if "month" in fields and "day" in fields:
+        months = np.array([int(row[fields["month"]]) for row in rows])
+        days = np.array([int(row[fields["day"]]) for row in rows])
+        temp, wind = _drop_leap_day(months, days, temp, wind)
+    return name, float(rows[0][fields["lat"]]), float(rows[0][fields["lon"]]), temp, wind
+
+
+def compile_store(paths, output):
+    # Stacje dopisywane kolejno do .bin – pamięć stała niezależnie od liczby plików
+    records = []
+    names = {}
+    name_end = 0
+    with open(output + ".bin.tmp", "wb") as data:
+        for path in paths:
+            try:
+                reader = read_epw if path.lower().endswith(".epw") else read_csv
+                name, lat, lon, temp, wind = reader(path)
+                if len(temp) != HOURS:
+                    raise ValueError(f"expected {HOURS} hours, got {len(temp)}")
+                temp = _fill_gaps(temp)
+                wind = _fill_gaps(wind)
+            except (OSError, ValueError, IndexError, StopIteration) as e:
+                print(f"Skipping {path}: {e}", file=sys.stderr)
+                continue
+            if name in names:
+                print(f"Skipping {path}: duplicate station name {name}", file=sys.stderr)
+                continue
+            names[name] = name.encode("utf-8")
+            name_end += len(names[name])
+            np.concatenate((temp, wind)).astype("<f4").tofile(data)
+            records.append((lat, lon, name_end))
+    with open(output + ".idx.tmp", "wb") as index:
+        index.write(MAGIC)
+        np.array([len(records)], dtype="<u8").tofile(index)
+        np.array(records, dtype=INDEX_DTYPE).tofile(index)
+        index.write(b"".join(names.values()))
+    os.replace(output + ".bin.tmp", output + ".bin")
+    os.replace(output + ".idx.tmp", output + ".idx")
+    return len(records)
+
+
+class StationStore:
+
+    def __init__(self, base_path):
+        with open(base_path + ".idx", "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{base_path}.idx is not a station store index (recompile it with this version)")
+            count = int(np.fromfile(f, dtype="<u8", count=1)[0])
+            records = np.fromfile(f, dtype=INDEX_DTYPE, count=count)
+            blob = f.read()
+            stat = os.fstat(f.fileno())
+        # Identyfikator wersji magazynu – składnik ETagów obliczeń
+        self.version = f"{os.path.basename(base_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+        starts = [0] + records["name_end"][:-1].tolist()
+        self.names = [blob[start:end].decode("utf-8") for start, end in zip(starts, records["name_end"].tolist())]
+        self.lats = records["lat"]
+        self.lons = records["lon"]
+        self._positions = {name: i for i, name in enumerate(self.names)}
+        if self.names:
+            self._data = np.memmap(base_path + ".bin", dtype="<f4", mode="r", shape=(len(self.names), BLOCK))
+        else:
+            self._data = np.zeros((0, BLOCK), dtype="<f4")
+        self.index = StationIndex(self.names, self.lats, self.lons)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    def hourly(self, name):
+        # Widoki na zmapowane strony (float32, tylko do odczytu)
+        block = self._data[self._positions[name]]
+        return block[:HOURS], block[HOURS:]
+
+    def reference_year(self, name, year):
+        temp, wind = (np.round(values.astype(float), 2) for values in self.hourly(name))
+        if calendar.isleap(year):
+            # 29 lutego jako powtórzenie 28 lutego
+            feb28 = slice(58 * 24, 59 * 24)
+            temp = np.insert(temp, 59 * 24, temp[feb28])
+            wind = np.insert(wind, 59 * 24, wind[feb28])
+        return ReferenceYear(temp, wind, daily_amplitude(temp, year_index(year)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = commands.add_parser("compile", help="compile EPW/CSV hourly files into a store")
+    compile_parser.add_argument("--output", required=True, help="base path of the store (without extension)")
+    compile_parser.add_argument("paths", nargs="+")
+    info_parser = commands.add_parser("info", help="list stations in a store")
+    info_parser.add_argument("store")
+    args = parser.parse_args(argv)
+    if args.command == "compile":
+        count = compile_store(args.paths, args.output)
+        print(f"Compiled {count} stations into {args.output}.bin / {args.output}.idx")
+    else:
+        store = StationStore(args.store)
+        for name, lat, lon in zip(store.names, store.lats, store.lons):
+            print(f"{name}\t{lat:.4f}\t{lon:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import csv
+import io
+import json
+import math
+
+import numpy as np
+
+from batch import parse_door, parse_hour, parse_number, door_operating_hours
+from engine import EMISSION_FACTOR, monthly_averages, monthly_energy, annual_totals
+
+MAX_SWEEP_POINTS = 100_000
+
+
+def _numbers(values, name):
+    return [parse_number(v, name) for v in values]
+
+
+def _energy_cost(values, name):
+    return [round(parse_number(v, name), 2) for v in values]
+
+
+def _flow(values, name):
+    return [parse_number(v, name) / 3600.0 for v in values]
+
+
+def _hours(values, name):
+    return [parse_hour(v) for v in values]
+
+
+# Parametr formularza -> (klucz w parse_door, konwersja wartości osi)
+SWEEP_PARAMS = {
+    "width": ("width", _numbers),
+    "height": ("height", _numbers),
+    "curtainFlow": ("curtain_flow_m3s", _flow),
+    "motorPower": ("motor_power", _numbers),
+    "curtainPrice": ("curtain_price", _numbers),
+    "energyCost": ("energy_cost", _energy_cost),
+    "windiness": ("wind_multiplier", None),
+    "indoorTempWinter": ("indoor_temp_winter", _numbers),
+    "indoorTempSummer": ("indoor_temp_summer", _numbers),
+    "exploitationIntensity": ("intensity", _numbers),
+    "openTime": ("open_hour", _hours),
+    "closeTime": ("close_hour", _hours),
+}
+
+
+def expand_axis(spec, name="axis", limit=MAX_SWEEP_POINTS):
+    # Lista wartości albo zakres {"start", "stop", "step"} (z końcem) lub {"start", "stop", "num"};
+    # liczbę punktów sprawdzamy, zanim powstanie tablica
+    if isinstance(spec, list):
+        count = len(spec)
+    elif isinstance(spec, dict):
+        start = parse_number(spec["start"], name + ".start")
+        stop = parse_number(spec["stop"], name + ".stop")
+        if "num" in spec:
+            count = parse_number(spec["num"], name + ".num")
+            if count != int(count):
+                raise ValueError(f"{name}.num must be an integer")
+        else:
+            step = parse_number(spec["step"], name + ".step")
+            if step <= 0:
+                raise ValueError("step must be positive")
+            # Przy bardzo małym kroku iloraz może być ogromny albo nieskończony
+            count = min((stop - start) / step, limit) + 1e-9
+            count = math.floor(count) + 1 if count >= 0 else 0
+    else:
+        raise ValueError("expected a list or a range object")
+    if count <= 0:
+        raise ValueError("empty axis")
+    if count > limit:
+        raise ValueError(f"Sweep has too many points, the limit is {MAX_SWEEP_POINTS}")
+    if isinstance(spec, list):
+        return spec
+    if "num" in spec:
+        return np.linspace(start, stop, int(count)).tolist()
+    return (start + step * np.arange(count)).tolist()
+
+
+def _unique_pairs(first, second):
+    # Unikalne pary wartości i indeks pary dla każdego punktu (bez sortowania wierszy)
+    first_values, first_idx = np.unique(first, return_inverse=True)
+    second_values, second_idx = np.unique(second, return_inverse=True)
+    codes, inverse = np.unique(first_idx.ravel() * len(second_values) + second_idx.ravel(), return_inverse=True)
+    pairs = [(float(first_values[code // len(second_values)]), float(second_values[code % len(second_values)]))
+             for code in codes.tolist()]
+    return pairs, inverse.ravel()
+
+
+def run_sweep(base, grid, ref, yi, wind_scale):
+    # Iloczyn kartezjański osi grid wokół konfiguracji base; wynik kolumnowy
+    door = parse_door(base, wind_scale)
+    axes = []
+    n_points = 1
+    for name, spec in grid.items():
+        if name not in SWEEP_PARAMS:
+            raise ValueError(f"Unsupported sweep parameter: {name}")
+        # Kolejna oś dostaje to, co zostało z limitu punktów po poprzednich
+        values = expand_axis(spec, name, MAX_SWEEP_POINTS // n_points)
+        n_points *= len(values)
+        key, convert = SWEEP_PARAMS[name]
+        if name == "windiness":
+            converted = [wind_scale[str(v)] for v in values]
+        else:
+            converted = convert(values, name)
+        axes.append((name, values, key, np.array(converted)))
+    shape = tuple(len(values) for _, values, _, _ in axes)
+
+    positions = np.unravel_index(np.arange(n_points), shape) if shape else ()
+    params = {key: np.full(n_points, float(door[key])) for key, _ in SWEEP_PARAMS.values()}
+    for (_, _, key, converted), position in zip(axes, positions):
+        params[key] = converted[position]
+
+    # Średnie w godzinach pracy liczymy raz na parę (otwarcie, zamknięcie),
+    # godziny pracy raz na parę (długość dnia, intensywność)
+    windows, window_idx = _unique_pairs(params["open_hour"], params["close_hour"])
+    window_avgs = []
+    for open_hour, close_hour in windows:
+        if close_hour <= open_hour:
+            raise ValueError("Closing time must be later than opening time.")
+        avgs = monthly_averages(ref.temp, yi, open_hour, close_hour)[1]
+        if any(val is None for val in avgs):
+            raise ValueError("No operating hours in the selected time window")
+        window_avgs.append(avgs)
+    schedules, schedule_idx = _unique_pairs(params["close_hour"] - params["open_hour"], params["intensity"])
+    schedule_hours = [[int(round(h * intensity)) for h in door_operating_hours(door, yi.year, length)]
+                      for length, intensity in schedules]
+
+    def column(key):
+        return params[key][:, None]
+
+    energy = monthly_energy(np.array(window_avgs)[window_idx], np.array(schedule_hours)[schedule_idx],
+                            column("width"), column("height"), column("curtain_flow_m3s"),
+                            column("motor_power"), column("wind_multiplier"),
+                            column("indoor_temp_winter"), column("indoor_temp_summer"))
+    totals = annual_totals(energy, params["energy_cost"], params["curtain_price"])
+
+    columns = {name: [values[i] for i in position.tolist()] for (name, values, _, _), position in zip(axes, positions)}
+    columns["annual_savings_energy"] = totals["annual_savings_energy"].tolist()
+    columns["annual_savings_cost"] = totals["annual_savings_cost"].tolist()
+    # Zwrot z dokładnością do 0,01 roku, jak w raporcie – krótszy JSON/CSV
+    columns["payback_period"] = [None if math.isnan(p) else p
+                                 for p in np.round(totals["payback_period"], 2).tolist()]
+    columns["carbon_footprint"] = np.round(totals["annual_savings_energy"] * EMISSION_FACTOR, 1).tolist()
+    return columns
+
+
+def columns_to_json(columns, station):
+    yield json.dumps({"station": station, "points": len(columns["payback_period"]), "columns": columns},
+                     ensure_ascii=False)
+
+
+def columns_to_csv(columns, rows_per_chunk=10000):
+    names = list(columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    data = list(zip(*(columns[name] for name in names)))
+    for start in range(0, len(data), rows_per_chunk):
+        writer.writerows(data[start:start + rows_per_chunk])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
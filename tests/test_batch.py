@@ -0,0 +1,36 @@
+import pytest
+
+from batch import parse_door
+
+WIND_SCALE = {"4": 1.0}
+DOOR = {"lat": 52.2, "lng": 21.0, "width": 1.5, "height": 2.0, "curtainFlow": 2500}
+
+
+def test_parse_door_defaults():
+    door = parse_door(DOOR, WIND_SCALE)
+    assert door["curtain_flow_m3s"] == 2500 / 3600.0
+    assert (door["open_hour"], door["close_hour"]) == (8.0, 18.0)
+    assert door["weekday_hours"] is None
+
+
+@pytest.mark.parametrize("key", ["lat", "width", "curtainFlow", "energyCost", "indoorTempWinter"])
+@pytest.mark.parametrize("value", ["nan", "inf", "-Infinity", float("nan")])
+def test_parse_door_rejects_non_finite_numbers(key, value):
+    with pytest.raises(ValueError, match=key):
+        parse_door(dict(DOOR, **{key: value}), WIND_SCALE)
+
+
+def test_parse_door_rejects_non_finite_intensity():
+    with pytest.raises(ValueError, match="exploitationIntensity"):
+        parse_door(dict(DOOR, schedule={"exploitationIntensity": "nan"}), WIND_SCALE)
+
+
+@pytest.mark.parametrize("weekday_hours", [["Monday"], [], [8, 8, 8, 8, 8, 0, 0], "Monday"])
+def test_parse_door_rejects_weekday_hours_that_are_not_a_mapping(weekday_hours):
+    with pytest.raises(ValueError, match="weekdayHours"):
+        parse_door(dict(DOOR, schedule={"weekdayHours": weekday_hours}), WIND_SCALE)
+
+
+def test_parse_door_weekday_hours():
+    door = parse_door(dict(DOOR, schedule={"weekdayHours": {"Monday": 8, "Saturday": 4}}), WIND_SCALE)
+    assert door["weekday_hours"] == (8.0, 0.0, 0.0, 0.0, 0.0, 4.0, 0.0)
@@ -0,0 +1,62 @@
+import calendar
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+
+from climate import A_DAY_TEMP, A_DAY_WIND, ReferenceYearCache, round1, synthesize_reference_year
+
+CITIES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cities.txt")
+
+
+def legacy_reference_year(city_info, year):
+    # Pierwotna synteza pętlami (przed wektoryzacją) – wzorzec zgodności wyników
+    temp, wind = [], []
+    for m in range(1, 13):
+        num_days = calendar.monthrange(year, m)[1]
+        offset = num_days / 2.0
+        for day in range(1, num_days + 1):
+            daily_temp = city_info["baseline"][m-1] + A_DAY_TEMP * math.sin(2 * math.pi * (day - offset) / num_days)
+            daily_wind = city_info["wind_baseline"][m-1] + A_DAY_WIND * math.sin(2 * math.pi * (day - offset) / num_days)
+            for hour in range(24):
+                temp.append(round(daily_temp + city_info["amplitude"][m-1] * math.sin(2 * math.pi * (hour - 6) / 24), 1))
+                wind.append(round(daily_wind + city_info["wind_amplitude"][m-1] * math.sin(2 * math.pi * (hour - 6) / 24), 1))
+    return temp, wind
+
+
+def load_cities():
+    with open(CITIES_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("year", [2024, 2025])
+def test_synthesis_matches_legacy_loop(year):
+    for city, info in load_cities().items():
+        ref = synthesize_reference_year(info, year)
+        temp, wind = legacy_reference_year(info, year)
+        assert ref.temp.tolist() == temp, city
+        assert ref.wind.tolist() == wind, city
+        assert ref.amplitude == list(info["amplitude"])
+
+
+def test_round1_matches_builtin_round():
+    rng = np.random.default_rng(0)
+    # Wartości dokładnie w połowie i tuż obok, gdzie np.round potrafi odbiegać od round()
+    values = np.concatenate([rng.uniform(-40, 40, 100000), np.arange(-400, 400) / 10 + 0.05,
+                             np.array([0.15, 0.25, 0.35, 1.45, 2.675, -0.15, -2.675])])
+    assert round1(values).tolist() == [round(v, 1) for v in values.tolist()]
+
+
+def test_warm_up_stops_at_cache_size():
+    cities = dict(list(load_cities().items())[:10])
+    built = []
+    cache = ReferenceYearCache(maxsize=4, build=lambda info, year: built.append(info) or info)
+    cache.warm_up(cities, 2025)
+    assert len(built) == 4 and len(cache) == 4
+
+    built.clear()
+    hot = list(cities)[5:7] + ["Atlantis"]
+    ReferenceYearCache(maxsize=4, build=lambda info, year: built.append(info) or info).warm_up(cities, 2025, hot)
+    assert built == [cities[name] for name in hot[:2]]
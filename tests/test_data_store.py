@@ -0,0 +1,24 @@
+import json
+import os
+
+from data_store import load_cities
+
+CITIES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cities.txt")
+
+
+def test_load_cities_keeps_long_multibyte_names(tmp_path):
+    with open(CITIES_FILE, encoding="utf-8") as f:
+        cities = json.load(f)
+    long_name = "Łódź-Lublinek, port lotniczy im. Władysława Reymonta – gęś ąę"
+    assert len(long_name.encode("utf-8")) > 64
+    cities[long_name] = dict(next(iter(cities.values())), lat=51.72, lon=19.39)
+    source = tmp_path / "cities.txt"
+    source.write_text(json.dumps(cities, ensure_ascii=False), encoding="utf-8")
+
+    # Pierwsze wczytanie kompiluje plik, drugie czyta skompilowaną wersję
+    for _ in range(2):
+        table = load_cities(str(source), str(tmp_path / "compiled"))
+        assert table.names == list(cities)
+        assert table[long_name]["lat"] == 51.72
+        assert table[long_name]["baseline"] == cities[long_name]["baseline"]
+    assert os.listdir(tmp_path / "compiled") == ["cities.txt.bin"]
@@ -0,0 +1,117 @@
+import datetime
+import math
+import random
+
+import pytest
+
+from climate import synthesize_reference_year
+from engine import EMISSION_FACTOR, annual_totals, monthly_averages, monthly_energy, weekly_averages, year_index
+from test_climate import load_cities
+
+# Pierwotne pętle z app.py (przed przejściem na numpy) – wzorzec zgodności zaokrąglonych wyników
+
+
+def legacy_hours(values, year):
+    start = datetime.datetime(year, 1, 1)
+    return [(start + datetime.timedelta(hours=i), value) for i, value in enumerate(values)]
+
+
+def legacy_monthly_averages(hourly, open_hour, close_hour):
+    monthly = {m: [] for m in range(1, 13)}
+    operating = {m: [] for m in range(1, 13)}
+    for dt, value in hourly:
+        monthly[dt.month].append(value)
+        if open_hour <= dt.hour + dt.minute / 60.0 < close_hour:
+            operating[dt.month].append(value)
+    full = [round(sum(monthly[m]) / len(monthly[m]), 1) if monthly[m] else None for m in range(1, 13)]
+    op = [round(sum(operating[m]) / len(operating[m]), 1) if operating[m] else None for m in range(1, 13)]
+    return full, op
+
+
+def legacy_weekly_averages(hourly):
+    daily = {}
+    for dt, value in hourly:
+        daily.setdefault(dt.date(), []).append(value)
+    weekly = {}
+    for day, values in daily.items():
+        weekly.setdefault(day.isocalendar()[1], []).append(sum(values) / len(values))
+    weeks = sorted(weekly)
+    return weeks, [round(sum(weekly[w]) / len(weekly[w]), 1) for w in weeks]
+
+
+def legacy_energy(operating_avgs, hours, width, height, flow, motor_power, wind_multiplier,
+                  winter, summer, energy_cost):
+    energy_without, energy_with, motor = [], [], []
+    for i in range(12):
+        t_operating = operating_avgs[i]
+        if t_operating < winter:
+            indoor = winter
+        elif t_operating > summer:
+            indoor = summer
+        else:
+            indoor = t_operating
+        delta_t = abs(indoor - t_operating)
+        delta_p = 1.2 * 9.81 * height * (delta_t / (indoor + 273.15))
+        q_corrected = 0.6 * (width * height) * math.sqrt((2 * delta_p) / 1.2) * wind_multiplier
+        e_no = (q_corrected * 1.2 * 1005 * delta_t / 1000) * hours[i]
+        eta = min(flow / q_corrected, 1.0) if q_corrected > 0 else 0
+        e_curtain = (q_corrected * (1 - eta) * 1.2 * 1005 * delta_t / 1000) * hours[i]
+        motor.append(int(round(hours[i] * motor_power)))
+        energy_without.append(int(round(e_no)))
+        energy_with.append(int(round(e_curtain)))
+    total_without, total_with, annual_motor = sum(energy_without), sum(energy_with), sum(motor)
+    cost_with_motor = int(round(total_with * energy_cost)) + int(round(annual_motor * energy_cost))
+    savings_cost = int(round(total_without * energy_cost)) - cost_with_motor
+    return {
+        "energy_without": energy_without,
+        "energy_with": energy_with,
+        "motor_energy": motor,
+        "annual_cost_without": int(round(total_without * energy_cost)),
+        "annual_cost_with_motor": cost_with_motor,
+        "annual_savings_energy": total_without - (total_with + annual_motor),
+        "annual_savings_cost": savings_cost,
+        "payback_period": 1100.0 / savings_cost if savings_cost > 0 else None,
+        "carbon_footprint": round((total_without - (total_with + annual_motor)) * EMISSION_FACTOR, 1),
+    }
+
+
+@pytest.mark.parametrize("year", [2024, 2025])
+def test_aggregations_match_legacy_loops(year):
+    yi = year_index(year)
+    rng = random.Random(year)
+    for city, info in load_cities().items():
+        ref = synthesize_reference_year(info, year)
+        for values in (ref.temp, ref.wind):
+            hourly = legacy_hours(values.tolist(), year)
+            assert weekly_averages(values, yi) == legacy_weekly_averages(hourly), city
+            open_hour = rng.randint(0, 20) + rng.choice([0, 0.5])
+            close_hour = rng.randint(int(open_hour) + 1, 24) - rng.choice([0, 1 / 60])
+            for window in ((open_hour, close_hour), (8, 18), (0, 24)):
+                assert monthly_averages(values, yi, *window) == legacy_monthly_averages(hourly, *window), city
+
+
+def test_energy_model_matches_legacy_loop():
+    yi = year_index(2025)
+    rng = random.Random(7)
+    for city, info in load_cities().items():
+        ref = synthesize_reference_year(info, 2025)
+        operating_avgs = monthly_averages(ref.temp, yi, 8, 18)[1]
+        for _ in range(10):
+            hours = [rng.randint(0, 400) for _ in range(12)]
+            params = dict(width=rng.choice([1, 1.5, 2.3, 4]), height=rng.choice([2, 2.5, 3.1]),
+                          flow=rng.choice([500, 2500, 6000, 12000]) / 3600.0, motor_power=rng.choice([0.3, 1.1]),
+                          wind_multiplier=rng.choice([0, 0.5, 1.0, 1.75]), winter=rng.choice([16, 18, 20]),
+                          summer=rng.choice([22, 24]))
+            energy_cost = round(rng.choice([0.1, 0.25, 0.333]), 2)
+            energy = monthly_energy(operating_avgs, hours, params["width"], params["height"], params["flow"],
+                                    params["motor_power"], params["wind_multiplier"],
+                                    params["winter"], params["summer"])
+            totals = annual_totals(energy, energy_cost, 1100.0)
+            expected = legacy_energy(operating_avgs, hours, energy_cost=energy_cost, **params)
+            for key, value in expected.items():
+                actual = totals[key].tolist()
+                if key == "carbon_footprint":
+                    actual = round(actual, 1)
+                elif key == "payback_period" and math.isnan(actual):
+                    actual = None
+                assert actual == value, (city, key)
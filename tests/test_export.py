@@ -0,0 +1,51 @@
+import io
+import math
+
+import numpy as np
+
+from batch import run_batch
+from climate import synthesize_reference_year
+from engine import year_index
+from export import BATCH_COLUMNS, columnar_blocks, read_columnar
+from test_climate import load_cities
+
+WIND_SCALE = {"4": 1.0}
+
+
+def test_columnar_round_trip_of_batch_results():
+    cities = load_cities()
+    names = sorted(cities)[:3]
+    refs = {name: synthesize_reference_year(cities[name], 2025) for name in names}
+    stations = {name: f"Stacja {name} – Łódź 東京" for name in names}
+
+    def locate(lat, lng):
+        name = names[int(lat) % len(names)]
+        return refs[name], stations[name]
+
+    doors = []
+    for i in range(40):
+        door = {"id": ["Brama №%d" % i, "門-%d" % i, i, None][i % 4], "lat": 50 + i, "lng": 20,
+                "width": 1 + i / 10, "height": 2.5, "curtainFlow": 1000 + 100 * i}
+        if i % 7 == 3:
+            door["width"] = "nan"
+        if i % 11 == 5:
+            door["schedule"] = {"openTime": "18:00", "closeTime": "08:00"}
+        doors.append(door)
+    rows = list(run_batch(doors, locate, year_index(2025), WIND_SCALE))
+    assert any("error" in row for row in rows)
+
+    blocks = list(read_columnar(io.BytesIO(b"".join(columnar_blocks(iter(rows), rows_per_block=7)))))
+    assert len(blocks) == 6
+    columns = {name: [value for block in blocks for value in list(block[name])] for name, _ in BATCH_COLUMNS}
+    expected = [row for row in rows if "fleet" not in row]
+    assert len(columns["index"]) == len(expected)
+    for position, row in enumerate(expected):
+        for name, dtype in BATCH_COLUMNS:
+            value = columns[name][position]
+            if dtype == "utf8":
+                assert value == ("" if row.get(name) is None else str(row[name])), (position, name)
+            elif row.get(name) is None:
+                assert math.isnan(value), (position, name)
+            else:
+                assert value == row[name], (position, name)
+    assert all(isinstance(block["annual_savings_cost"], np.ndarray) for block in blocks)
@@ -0,0 +1,47 @@
+import time
+
+from flask import Flask, Response
+
+from metrics import Metrics
+
+
+def test_render_sums_snapshots_of_all_workers(tmp_path):
+    # Dwie instancje z tym samym katalogiem udają dwa workery gunicorna
+    workers = [Metrics(enabled=True, directory=str(tmp_path)) for _ in range(2)]
+    for position, metrics in enumerate(workers):
+        metrics.register("aircurtain_cache_hits_total", "counter", "Cache hits",
+                         lambda position=position: [((("cache", "pdf"),), position + 1)])
+        for _ in range(position + 2):
+            metrics.observe("aircurtain_stage_seconds", (("stage", "render"),), 0.002)
+        metrics.flush()
+
+    text = workers[0].render()
+    assert 'aircurtain_stage_seconds_count{stage="render"} 5' in text
+    assert 'aircurtain_cache_hits_total{cache="pdf"} 3' in text
+    assert text == workers[1].render()
+
+
+def test_render_without_directory_reports_own_process():
+    metrics = Metrics(enabled=True)
+    metrics.observe("aircurtain_request_seconds", (("endpoint", "index"),), 0.01)
+    assert 'aircurtain_request_seconds_count{endpoint="index"} 1' in metrics.render()
+
+
+def test_streamed_response_is_timed_until_the_body_is_sent():
+    app = Flask(__name__)
+    metrics = Metrics(enabled=True)
+    metrics.init_app(app)
+
+    @app.route("/slow")
+    def slow():
+        def generate():
+            time.sleep(0.3)
+            yield "done"
+        return Response(generate())
+
+    response = app.test_client().get("/slow")
+    assert response.get_data(as_text=True) == "done"
+    response.close()
+    text = metrics.render()
+    assert 'aircurtain_request_seconds_count{endpoint="slow",method="GET",status="200"} 1' in text
+    assert 'aircurtain_request_seconds_bucket{endpoint="slow",method="GET",status="200",le="0.25"} 0' in text
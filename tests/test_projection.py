@@ -0,0 +1,38 @@
+import pytest
+
+from climate import synthesize_reference_year
+from projection import run_projection
+from test_climate import load_cities
+
+WIND_SCALE = {"4": 1.0}
+DOOR = {"lat": 52.2, "lng": 21.0, "width": 1.5, "height": 2.0, "curtainFlow": 2500}
+
+
+def locate(year):
+    cities = load_cities()
+    return synthesize_reference_year(cities[sorted(cities)[0]], year)
+
+
+@pytest.mark.parametrize("options, message", [
+    ({"discountRate": -1}, "discountRate"),
+    ({"discountRate": "nan"}, "discountRate"),
+    ({"energyEscalation": "nan"}, "energyEscalation"),
+    ({"energyEscalation": -1}, "energyEscalation"),
+    ({"emissionDecline": 2}, "emissionDecline"),
+    ({"emissionDecline": -0.1}, "emissionDecline"),
+    ({"warming": float("inf")}, "warming"),
+    ({"startYear": 10 ** 6}, "startYear"),
+    ({"startYear": float("inf")}, "startYear"),
+    ({"horizon": float("inf")}, "horizon"),
+])
+def test_projection_rejects_out_of_range_options(options, message):
+    with pytest.raises(ValueError, match=message):
+        run_projection(dict(DOOR, projection=options), locate, 2025, WIND_SCALE)
+
+
+def test_projection_accepts_boundary_options():
+    result = run_projection(dict(DOOR, projection={"horizon": 3, "emissionDecline": 0, "discountRate": 0,
+                                                   "warming": "none", "energyEscalation": 0}),
+                            locate, 2025, WIND_SCALE)
+    assert [row["year"] for row in result["years"]] == [2025, 2026, 2027]
+    assert result["npv"] == result["years"][-1]["cumulative_cashflow"]
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from sizing import pareto_front
+
+
+def brute_force_front(payback, npv, co2):
+    front = []
+    for i in range(len(payback)):
+        dominated = any(payback[j] <= payback[i] and npv[j] >= npv[i] and co2[j] >= co2[i]
+                        and (payback[j] < payback[i] or npv[j] > npv[i] or co2[j] > co2[i])
+                        for j in range(len(payback)))
+        if not dominated:
+            front.append(i)
+    return front
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_pareto_front_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 300))
+    # Małe zakresy wartości – dużo remisów i duplikatów; część modeli bez zwrotu (inf)
+    payback = rng.integers(0, 15, n).astype(float)
+    payback[rng.random(n) < 0.1] = np.inf
+    npv = rng.integers(-10, 10, n).astype(float)
+    co2 = rng.integers(0, 10, n).astype(float)
+    assert pareto_front(payback, npv, co2).tolist() == brute_force_front(payback, npv, co2)
+
+
+def test_pareto_front_of_continuous_values():
+    rng = np.random.default_rng(42)
+    payback, npv, co2 = rng.random((3, 500))
+    assert pareto_front(payback, npv, co2).tolist() == brute_force_front(payback, npv, co2)
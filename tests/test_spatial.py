@@ -0,0 +1,50 @@
+import math
+import random
+
+import pytest
+
+from spatial import EARTH_RADIUS_KM, StationIndex
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlam = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def random_stations(count, seed):
+    rng = random.Random(seed)
+    stations = [(f"S{i}", math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180))
+                for i in range(count)]
+    # Skupiska przy antypołudniku i biegunach
+    stations += [(f"A{i}", rng.uniform(-60, 60), rng.choice([-1, 1]) * rng.uniform(179, 180)) for i in range(40)]
+    stations += [(f"P{i}", rng.choice([-1, 1]) * rng.uniform(88, 90), rng.uniform(-180, 180)) for i in range(40)]
+    return stations
+
+
+QUERIES = [(52.23, 21.01), (0.0, 180.0), (0.0, -180.0), (-16.5, 179.9), (65.0, -179.95),
+           (90.0, 0.0), (-90.0, 0.0), (89.99, 123.0), (-89.5, -45.0), (0.0, 0.0)]
+
+
+@pytest.mark.parametrize("leaf_size", [1, 4, 16])
+def test_query_matches_brute_force_haversine(leaf_size):
+    stations = random_stations(1000, leaf_size)
+    names, lats, lons = zip(*stations)
+    index = StationIndex(names, lats, lons, leaf_size=leaf_size)
+    rng = random.Random(1)
+    queries = QUERIES + [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(100)]
+    for lat, lon in queries:
+        for k in (1, 3, 8):
+            expected = sorted((haversine(lat, lon, s_lat, s_lon), name) for name, s_lat, s_lon in stations)[:k]
+            result = index.query(lat, lon, k)
+            assert [name for name, _ in result] == [name for _, name in expected], (lat, lon, k)
+            for (_, km), (exp_km, _) in zip(result, expected):
+                assert km == pytest.approx(exp_km, abs=1e-6)
+
+
+def test_query_small_and_empty_index():
+    assert StationIndex([], [], []).query(10, 10, 3) == []
+    index = StationIndex(["A", "B"], [0.0, 0.0], [179.5, -179.0])
+    assert [name for name, _ in index.query(0.0, -179.9, 5)] == ["A", "B"]
@@ -0,0 +1,33 @@
+import csv
+
+import numpy as np
+
+from station_store import HOURS, StationStore, compile_store
+
+
+def write_csv(path, station, lat, lon, temp=5.0):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["station", "lat", "lon", "temperature", "wind"])
+        for hour in range(HOURS):
+            writer.writerow([station if hour == 0 else "", lat, lon, temp + hour % 24 / 10, 3.0])
+
+
+def test_compile_and_load_long_multibyte_names(tmp_path):
+    # Nazwy dłuższe niż 64 bajty z wielobajtowymi znakami na granicy
+    long_name = "Łódź-Lublinek, port lotniczy im. Władysława Reymonta – gęś ąę"
+    names = [long_name, long_name + " (2)", "Kraków"]
+    paths = []
+    for i, name in enumerate(names):
+        path = tmp_path / f"s{i}.csv"
+        write_csv(path, name, 50.0 + i, 19.0 + i, temp=float(i))
+        paths.append(str(path))
+    assert len(names[0].encode("utf-8")) > 64
+
+    assert compile_store(paths, str(tmp_path / "store")) == 3
+    store = StationStore(str(tmp_path / "store"))
+    assert store.names == names
+    assert np.allclose(store.lats, [50.0, 51.0, 52.0])
+    temp, wind = store.hourly(names[2])
+    assert temp[0] == 2.0 and wind[0] == 3.0
+    assert store.index.query(51.0, 20.0)[0][0] == names[1]
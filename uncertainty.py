@@ -0,0 +1,122 @@
+import math
+
+import numpy as np
+
+from batch import parse_door, parse_integer, parse_number, door_operating_hours
+from engine import EMISSION_FACTOR, monthly_averages, monthly_energy, annual_totals
+
+DEFAULT_DRAWS = 10000
+MAX_DRAWS = 100000
+HISTOGRAM_BINS = 30
+PERCENTILES = (10, 50, 90)
+
+# Parametr -> klucz w parse_door; rozkład opisuje wartość po konwersji
+# (dla windiness bezpośrednio mnożnik wiatru albo "choice" ze skali 0–7)
+UNCERTAIN_PARAMS = {
+    "exploitationIntensity": "intensity",
+    "windiness": "wind_multiplier",
+    "energyCost": "energy_cost",
+    "curtainFlow": "curtain_flow_m3s",
+    "indoorTempWinter": "indoor_temp_winter",
+    "indoorTempSummer": "indoor_temp_summer",
+}
+
+
+def sample(spec, rng, draws, convert=None):
+    kind = spec.get("dist", "normal")
+
+    def number(key):
+        return parse_number(spec[key], key)
+
+    if kind == "normal":
+        values = rng.normal(number("mean"), number("sd"), draws)
+    elif kind == "uniform":
+        values = rng.uniform(number("low"), number("high"), draws)
+    elif kind == "triangular":
+        values = rng.triangular(number("low"), number("mode"), number("high"), draws)
+    elif kind == "lognormal":
+        values = rng.lognormal(number("mean"), number("sigma"), draws)
+    elif kind == "choice":
+        choices = np.array([parse_number(v, "values") if convert is None else convert(v) for v in spec["values"]])
+        values = rng.choice(choices, draws, p=spec.get("p"))
+    else:
+        raise ValueError(f"Unknown distribution: {kind}")
+    if "min" in spec or "max" in spec:
+        values = np.clip(values, number("min") if "min" in spec else -np.inf,
+                         number("max") if "max" in spec else np.inf)
+    return values
+
+
+def _summary(values, finite_only=False):
+    data = values[np.isfinite(values)] if finite_only else values
+    if not len(data):
+        return {"percentiles": {f"p{p}": None for p in PERCENTILES}, "histogram": {"edges": [], "counts": []}}
+    # "nearest" – percentyl zawsze jest jedną z symulacji (także inf = brak zwrotu)
+    percentiles = np.percentile(values, PERCENTILES, method="nearest")
+    counts, edges = np.histogram(data, bins=HISTOGRAM_BINS)
+    return {
+        "percentiles": {f"p{p}": (None if not math.isfinite(v) else round(v, 2))
+                        for p, v in zip(PERCENTILES, percentiles.tolist())},
+        "histogram": {"edges": np.round(edges, 2).tolist(), "counts": counts.tolist()},
+    }
+
+
+def run_uncertainty(config, ref, yi, wind_scale):
+    door = parse_door(config, wind_scale)
+    spec = config.get("uncertainty") or {}
+    if not isinstance(spec, dict):
+        raise ValueError("\"uncertainty\" must be an object")
+    draws = parse_integer(spec.get("draws", DEFAULT_DRAWS), "draws")
+    if not 1 <= draws <= MAX_DRAWS:
+        raise ValueError(f"draws must be between 1 and {MAX_DRAWS}")
+    seed = parse_integer(spec.get("seed", 0), "seed")
+    rng = np.random.default_rng(seed)
+
+    params = {key: np.full(draws, float(door[key])) for key in UNCERTAIN_PARAMS.values()}
+    for name, key in UNCERTAIN_PARAMS.items():
+        if name not in spec:
+            continue
+        if not isinstance(spec[name], dict):
+            raise ValueError(f"{name} must be a distribution object, e.g. {{\"dist\": \"uniform\", ...}}")
+        if name == "windiness":
+            params[key] = sample(spec[name], rng, draws, convert=lambda v: wind_scale[str(v)])
+        elif name == "curtainFlow":
+            params[key] = sample(spec[name], rng, draws) / 3600.0
+        else:
+            params[key] = sample(spec[name], rng, draws)
+    params["intensity"] = np.clip(params["intensity"], 0.0, 1.0)
+    # Rozkład normalny może dać ujemny wydatek kurtyny lub cenę energii – obcinamy do zera
+    for key in ("wind_multiplier", "curtain_flow_m3s", "energy_cost"):
+        params[key] = np.maximum(params[key], 0.0)
+
+    operating_avgs = monthly_averages(ref.temp, yi, door["open_hour"], door["close_hour"])[1]
+    if any(val is None for val in operating_avgs):
+        raise ValueError("No operating hours in the selected time window")
+    # Zmienność pogody: wspólne odchylenie roku + niezależne odchylenia miesięcy
+    weather = spec.get("weather") or {}
+    if not isinstance(weather, dict):
+        raise ValueError("\"weather\" must be an object with year_sd and month_sd")
+    temps = np.tile(np.array(operating_avgs), (draws, 1))
+    temps += rng.normal(0.0, parse_number(weather.get("year_sd", 0.0), "year_sd"), (draws, 1))
+    temps += rng.normal(0.0, parse_number(weather.get("month_sd", 0.0), "month_sd"), (draws, 12))
+
+    monthly_hours = np.array(door_operating_hours(door, yi.year, door["close_hour"] - door["open_hour"]))
+    hours = np.rint(monthly_hours * params["intensity"][:, None])
+
+    def column(key):
+        return params[key][:, None]
+
+    energy = monthly_energy(temps, hours, door["width"], door["height"], column("curtain_flow_m3s"),
+                            door["motor_power"], column("wind_multiplier"),
+                            column("indoor_temp_winter"), column("indoor_temp_summer"))
+    totals = annual_totals(energy, params["energy_cost"], door["curtain_price"])
+    payback = np.where(np.isnan(totals["payback_period"]), np.inf, totals["payback_period"])
+    return {
+        "draws": draws,
+        "seed": seed,
+        "probability_no_payback": round(float(np.isinf(payback).mean()), 4),
+        "annual_savings_cost": _summary(totals["annual_savings_cost"].astype(float)),
+        "annual_savings_energy": _summary(totals["annual_savings_energy"].astype(float)),
+        "payback_period": _summary(payback, finite_only=True),
+        "carbon_footprint": _summary(totals["annual_savings_energy"] * EMISSION_FACTOR),
+    }